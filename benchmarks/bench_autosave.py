@@ -0,0 +1,74 @@
+"""
+Autosave write-path benchmark.
+
+Simulates many concurrent editing sessions calling AutosaveQueue.put() the
+way the app does on every field commit, and reports the latency each
+interaction pays plus how quickly the background writer keeps up.
+
+    python benchmarks/bench_autosave.py --sessions 200 --edits 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charbible import FIELD_KEYS  # noqa: E402
+from charbible.drafts import AutosaveQueue, DraftStore  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--edits", type=int, default=50, help="field commits per session")
+    parser.add_argument("--delay", type=float, default=0.25, help="debounce delay (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = AutosaveQueue(DraftStore(os.path.join(tmp, "bench.db")), delay=args.delay)
+        latencies = []
+        lock = threading.Lock()
+
+        def session(n):
+            rng = random.Random(n)
+            draft_id = f"session-{n}"
+            mine = []
+            for i in range(args.edits):
+                key = rng.choice(FIELD_KEYS)
+                value = f"{key} edit {i} " + "x" * rng.randint(10, 400)
+                started = time.perf_counter()
+                queue.put(draft_id, {key: value})
+                mine.append((time.perf_counter() - started) * 1e6)
+                time.sleep(rng.uniform(0, 0.002))
+            with lock:
+                latencies.extend(mine)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(n,)) for n in range(args.sessions)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        queue.close()
+        elapsed = time.perf_counter() - started
+
+        print(f"sessions={args.sessions} edits/session={args.edits} puts={len(latencies)}")
+        print(f"put latency us: p50={statistics.median(latencies):.1f} "
+              f"p99={percentile(latencies, 99):.1f} max={max(latencies):.1f}")
+        print(f"flushes={queue.flushes} wall={elapsed:.2f}s "
+              f"drafts={len(queue.drafts.list_drafts(limit=args.sessions + 1))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Phrase collision benchmark: LSH index against a pairwise scan.
+
+Builds a PhraseIndex over synthetic personas at several roster sizes and
+times checking one new persona against it. Phrases are drawn from a Zipf
+vocabulary; each persona has a --plant chance per phrase of reusing a
+lightly edited phrase from an earlier persona, so there is something to
+find. The pairwise column is the exact Jaccard scan over every indexed
+phrase that the index replaces.
+
+    python benchmarks/bench_collisions.py --sizes 500 2000 8000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charbible import CharacterBible  # noqa: E402
+from charbible.collisions import PhraseIndex, jaccard, persona_phrases, shingles  # noqa: E402
+
+
+def phrase(rng, vocabulary, cum_weights):
+    return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(5, 12))).capitalize() + "."
+
+
+def synthetic(rng, vocabulary, cum_weights, plant, pool, n):
+    def line():
+        if pool and rng.random() < plant:
+            words = rng.choice(pool).split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)  # a light edit
+            return " ".join(words)
+        text = phrase(rng, vocabulary, cum_weights)
+        pool.append(text)
+        return text
+
+    values = {
+        "char_name": f"Persona {n}",
+        "signature_phrases": "\n".join(line() for _ in range(12)),
+        "taglines": "\n".join(line() for _ in range(5)),
+        "local_references": " ".join(line() for _ in range(3)),
+    }
+    values.update({f"opinion_{i}": line() for i in range(1, 8)})
+    return CharacterBible(**values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--checks", type=int, default=50, help="new personas checked per size")
+    parser.add_argument("--plant", type=float, default=0.05,
+                        help="chance each phrase is an edited copy of an earlier one")
+    args = parser.parse_args()
+
+    # Random letter words: numbered tokens ("word123") would share most of their
+    # character shingles and make every phrase look alike
+    letters = random.Random(3)
+    vocabulary = sorted({"".join(letters.choices("abcdefghijklmnopqrstuvwxyz", k=letters.randint(2, 9)))
+                         for _ in range(20000)})
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+    for size in args.sizes:
+        rng = random.Random(11)
+        pool = []
+        personas = [synthetic(rng, vocabulary, cum_weights, args.plant, pool, n) for n in range(size)]
+        probes = [synthetic(rng, vocabulary, cum_weights, args.plant, pool, size + n) for n in range(args.checks)]
+
+        index = PhraseIndex()
+        started = time.perf_counter()
+        for n, bible in enumerate(personas):
+            index.add_persona(n, bible)
+        build = time.perf_counter() - started
+
+        lsh_times, found = [], 0
+        for probe in probes:
+            started = time.perf_counter()
+            found += len(index.check(probe))
+            lsh_times.append((time.perf_counter() - started) * 1000)
+
+        everything = [(p, shingles(p.text)) for n, bible in enumerate(personas) for p in persona_phrases(n, bible)]
+        pair_times, pair_found = [], 0
+        for probe in probes[:5]:
+            started = time.perf_counter()
+            for mine in persona_phrases(None, probe):
+                mine_set = shingles(mine.text)
+                pair_found += sum(jaccard(mine_set, theirs) >= index.threshold for _, theirs in everything)
+            pair_times.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        groups = index.report()
+        report = time.perf_counter() - started
+        print(f"{size:6d} personas  {len(index):7d} phrases  build {build:5.1f}s  "
+              f"check median {statistics.median(lsh_times):6.2f} ms  "
+              f"pairwise median {statistics.median(pair_times):8.1f} ms  "
+              f"report {report:5.2f}s ({len(groups)} groups)  "
+              f"found {found / len(probes):.1f}/persona (pairwise {pair_found / len(pair_times):.1f})")
+
+
+if __name__ == "__main__":
+    main()
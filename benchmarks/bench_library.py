@@ -0,0 +1,77 @@
+"""
+Library search benchmark.
+
+Fills a scratch library with synthetic personas and times ranked, prefix
+and field-filtered searches. Personas are drawn from a Zipf-distributed
+vocabulary, and each field has a --plant chance of being copied from the
+Nigel example. That chance controls how many personas a query matches:
+--plant 1.0 makes every persona match every query, which is the worst case.
+
+    python benchmarks/bench_library.py --personas 20000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charbible import FIELD_KEYS, CharacterBible  # noqa: E402
+from charbible.library import Library  # noqa: E402
+from charbible.presets import PresetPack  # noqa: E402
+
+NIGEL_EXAMPLE = PresetPack().fields("nigel_thistledown")
+
+QUERIES = ["Radio 4", "never_do:slang", "shakes*", '"handwritten notes"', "compost tea", "gard*"]
+
+
+def synthetic(rng, vocabulary, cum_weights, plant, n):
+    values = {}
+    for key in FIELD_KEYS:
+        if rng.random() < plant:
+            values[key] = NIGEL_EXAMPLE[key]
+        else:
+            values[key] = " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(5, 40)))
+    values["char_name"] = f"Persona {n}"
+    return CharacterBible(**values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--personas", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--plant", type=float, default=0.01,
+                        help="chance each field is copied from the example persona")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocabulary = [f"w{i:05d}" for i in range(30000)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+    with tempfile.TemporaryDirectory() as tmp:
+        library = Library(os.path.join(tmp, "bench.db"))
+        elapsed = 0.0
+        for n in range(args.personas):
+            bible = synthetic(rng, vocabulary, cum_weights, args.plant, n)
+            started = time.perf_counter()
+            library.save(bible)
+            elapsed += time.perf_counter() - started
+        print(f"indexed {args.personas} personas in {elapsed:.1f}s "
+              f"({elapsed / args.personas * 1000:.2f} ms/save)")
+
+        for query in QUERIES:
+            times = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                hits = library.search(query, limit=20)
+                times.append((time.perf_counter() - started) * 1000)
+            print(f"{query!r:24} hits={len(hits):3d} median={statistics.median(times):.2f} ms "
+                  f"max={max(times):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
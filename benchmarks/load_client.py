@@ -0,0 +1,158 @@
+"""
+Load-test client for the HTTP render service (charbible/server.py).
+
+Opens --concurrency keep-alive connections, each sending render requests
+back to back for --duration seconds, and reports requests/sec and latency
+percentiles. Personas are the Nigel preset with --personas distinct names,
+so the render cache sees that many distinct bodies. --revalidate is the
+share of requests that send the ETag from an earlier response for the same
+persona and expect 304.
+
+    python -m charbible serve --port 8502 &
+    python benchmarks/load_client.py --concurrency 32 --duration 10
+    python benchmarks/load_client.py --spawn --workers 4 --personas 500 --revalidate 0.5
+
+Standard library only; --spawn starts the service on a free port for the run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from charbible.presets import PresetPack  # noqa: E402
+
+
+def personas(count):
+    base = dict(PresetPack().fields("nigel_thistledown"))
+    return [json.dumps({**base, "char_name": f"{base['char_name']} {i}"}).encode("utf-8")
+            for i in range(count)]
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    body = await reader.readexactly(length) if length else b""
+    return status, headers, body
+
+
+async def connection(host, port, path, bodies, etags, revalidate, deadline, results, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            index = rng.randrange(len(bodies))
+            body = bodies[index]
+            extra = ""
+            if index in etags and rng.random() < revalidate:
+                extra = f"If-None-Match: {etags[index]}\r\n"
+            request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n{extra}\r\n").encode("latin-1") + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, headers, data = await read_response(reader)
+            results.append((time.perf_counter() - start, status, len(data)))
+            if status == 200:
+                etags[index] = headers["etag"]
+            if headers.get("connection") == "close":
+                break
+    finally:
+        writer.close()
+
+
+async def run(url, fmt, concurrency, duration, persona_count, revalidate, seed):
+    parts = urlsplit(url)
+    bodies = personas(persona_count)
+    etags = {}
+    results = []
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        connection(parts.hostname, parts.port or 80, f"/render/{fmt}", bodies, etags, revalidate,
+                   deadline, results, random.Random(rng.random()))
+        for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "format": fmt,
+        "concurrency": concurrency,
+        "personas": persona_count,
+        "revalidate": revalidate,
+        "requests": len(results),
+        "seconds": round(elapsed, 2),
+        "requests_per_sec": round(len(results) / elapsed, 1),
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        "mb_received": round(sum(r[2] for r in results) / 1e6, 1),
+        "statuses": statuses,
+    }
+
+
+def spawn_server(workers):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    command = [sys.executable, "-m", "charbible", "serve", "--port", str(port)]
+    if workers:
+        command += ["--workers", str(workers)]
+    proc = subprocess.Popen(command, cwd=ROOT, stderr=subprocess.PIPE, text=True)
+    proc.stderr.readline()  # "charbible render service on ..." once it is listening
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8502")
+    parser.add_argument("--format", default="voice_card")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=10.0)
+    parser.add_argument("--personas", type=int, default=100, help="distinct persona bodies")
+    parser.add_argument("--revalidate", type=float, default=0.0,
+                        help="share of requests sending If-None-Match once an ETag is known")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="start the service for this run")
+    parser.add_argument("--workers", type=int, default=None, help="with --spawn: render processes")
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if args.spawn:
+        proc, url = spawn_server(args.workers)
+    try:
+        report = asyncio.run(run(url, args.format, args.concurrency, args.duration,
+                                 args.personas, args.revalidate, args.seed))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    print(json.dumps(report, indent=2))
+    return 0 if set(report["statuses"]) <= {"200", "304"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
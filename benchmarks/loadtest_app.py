@@ -0,0 +1,185 @@
+"""
+Concurrent-session load test for app.py, built on streamlit.testing AppTest.
+
+Each simulated editor runs in its own process: AppTest swaps a process-wide
+Runtime on every run, so sessions cannot share an interpreter. Peak RSS is
+therefore per session; "growth" is the part above the bare interpreter plus
+Streamlit imports, i.e. roughly what each editor adds to a shared server.
+An editor loads the Nigel example, walks all 14 sections with Next, edits
+fields along the way, jumps to Generate and opens the first preview section
+of both outputs. Every interaction is one timed script run.
+
+    python benchmarks/loadtest_app.py --sessions 8
+    python benchmarks/loadtest_app.py --sessions 8 --save-baseline   # the old one moves to "previous"
+    python benchmarks/loadtest_app.py --sessions 8 --check      # exit 1 on regression
+    python benchmarks/loadtest_app.py --app /tmp/old/app.py     # another checkout, e.g. to bisect
+
+Runs fully offline; drafts and the library go to a throwaway database.
+Apps from before the Generate tabs were lazy (no generate_tab) are read
+from their text areas, so one harness measures every commit the same way.
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# (section index, widget key, text) edits made while walking the wizard
+EDITS = [
+    (0, "w_char_name", "Load Test Persona"),
+    (4, "w_signature_phrases", "One line.\nAnother line.\nA third line."),
+    (5, "w_opinion_1", "Benchmarks: 'Honest when boring'"),
+    (11, "w_never_do", "Never guess\nNever skip the baseline"),
+]
+
+GENERATE_TABS = [("📖 Full Character Bible", "bible"), ("🎯 Voice Card (Production)", "voice_card")]
+
+
+def _share_script_cache():
+    """Compile app.py once per process, as `streamlit run` does.
+
+    AppTest hands every run a fresh ScriptCache, so each run would recompile
+    the whole script (tens of ms for app.py) and the benchmark would track
+    the file's length rather than the app's work.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+
+
+def run_session(n, app=APP):
+    """One editor's full walk through the wizard.
+
+    Returns (latencies_ms, peak_rss_kb, rss_growth_kb).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    _share_script_cache()
+    sys.path.insert(0, os.path.dirname(app))  # its own charbible package, not this checkout's
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = []
+    at = AppTest.from_file(app, default_timeout=60)
+
+    def timed(step):
+        started = time.perf_counter()
+        step()
+        latencies.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise RuntimeError(f"session {n}: {at.exception[0].message}")
+
+    def button(label=None, key=None):
+        for b in at.button:
+            if (key and b.key == key) or (label and b.label == label):
+                return b
+        raise LookupError(label or key)
+
+    timed(at.run)
+    timed(lambda: button("📋 Load Example").click().run())
+    for section in range(13):
+        for edit_section, key, text in EDITS:
+            if edit_section == section:
+                widget = at.text_area(key=key) if key in {w.key for w in at.text_area} else at.text_input(key=key)
+                timed(lambda: widget.input(f"{text} #{n}").run())
+        timed(lambda: button("Next →").click().run())
+    timed(lambda: button(key="nav_13").click().run())
+    if "generate_tab" not in at.session_state:  # all outputs rendered up front, in text areas
+        outputs = [ta.value for ta in at.text_area][:2]
+    else:
+        outputs = []
+        for tab, kind in GENERATE_TABS:  # previews are collapsed st.code sections: open the first of each
+            at.session_state["generate_tab"] = tab
+            at.session_state[f"preview_{kind}_0"] = True
+            timed(at.run)
+            outputs.append("".join(code.value for code in at.code))
+    if not all(outputs) or f"#{n}" not in outputs[0]:
+        raise RuntimeError(f"session {n}: Generate step did not render the edited persona")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return latencies, peak, peak - rss_before
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(len(values) * pct / 100.0)) - 1)]
+
+
+def run(sessions, workers, app=APP):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["CHARBIBLE_DB"] = os.path.join(tmp, "loadtest.db")
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+            results = list(pool.map(run_session, range(sessions), [app] * sessions))
+        wall = time.perf_counter() - started
+    # The first run of each session pays for importing app.py; report it apart
+    cold = [session[0] for session, _, _ in results]
+    latencies = [ms for session, _, _ in results for ms in session[1:]]
+    return {
+        "sessions": sessions,
+        "concurrency": workers,
+        "interactions": len(latencies) + len(cold),
+        "rerun_ms_p50": round(statistics.median(latencies), 1),
+        "rerun_ms_p95": round(percentile(latencies, 95), 1),
+        "rerun_ms_p99": round(percentile(latencies, 99), 1),
+        "cold_start_ms_p50": round(statistics.median(cold), 1),
+        "peak_rss_mb_per_session": round(max(peak for _, peak, _ in results) / 1024, 1),
+        "rss_growth_mb_per_session": round(max(growth for _, _, growth in results) / 1024, 1),
+        "interactions_per_sec": round((len(latencies) + len(cold)) / wall, 1),
+    }
+
+
+def check(report, baseline, tolerance):
+    """Regressions beyond `tolerance` (fractional) for latency and memory."""
+    failures = []
+    for key in ("rerun_ms_p95", "rerun_ms_p99", "peak_rss_mb_per_session", "rss_growth_mb_per_session"):
+        limit = baseline[key] * (1 + tolerance)
+        if report[key] > limit:
+            failures.append(f"{key}: {report[key]} > {limit:.1f} (baseline {baseline[key]})")
+    limit = baseline["interactions_per_sec"] * (1 - tolerance)
+    if report["interactions_per_sec"] < limit:
+        failures.append(f"interactions_per_sec: {report['interactions_per_sec']} < {limit:.1f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="sessions running at once (default: --sessions)")
+    parser.add_argument("--app", default=APP, help="app.py to drive (default: this checkout's)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE}")
+    parser.add_argument("--check", action="store_true", help="compare against the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed fractional regression for --check (default 0.5 = 50%%)")
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.concurrency or args.sessions, os.path.abspath(args.app))
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        if os.path.exists(BASELINE):  # keep the baseline this one replaces, to compare against
+            with open(BASELINE, encoding="utf-8") as fh:
+                report["previous"] = {key: value for key, value in json.load(fh).items() if key != "previous"}
+        with open(BASELINE, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+            fh.write("\n")
+    if args.check:
+        with open(BASELINE, encoding="utf-8") as fh:
+            failures = check(report, json.load(fh), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""
+Headless Character Bible core: field schema, persona model and renderers.
+
+Nothing in this package imports Streamlit.
+"""
+
+from .schema import (
+    FIELDS, FIELD_KEYS, FIELDS_BY_KEY, GENERATE_SECTION, LIST_KEYS, REQUIRED_KEYS,
+    SECTIONS, Field, Section, section_fields,
+)
+from .model import CharacterBible
+from .render import render_full_bible, render_voice_card
+from .formats import FORMATS, Format, PersonaIR, build_ir, export, output_digest, register, roundtrip_errors
+from .store import FieldStore
+from .budget import BudgetReport, budgeted_voice_card, count_tokens, count_words
+from .cache import (
+    RENDER_CACHE, LRUCache, memoized_budgeted_voice_card, memoized_full_bible, memoized_voice_card,
+)
@@ -0,0 +1,156 @@
+"""
+Streaming ZIP export of saved personas.
+
+iter_zip() produces the archive as a sequence of byte chunks while it is
+being built: each persona is loaded, rendered, compressed and released before
+the next one is touched, so memory does not grow with the number of
+personas. ExportJob runs that stream on a background thread into a file on
+disk and reports progress. Archives older than CHARBIBLE_EXPORT_MAX_AGE
+seconds (default 3600) are deleted whenever a new job starts, so abandoned
+sessions don't leave them behind.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date
+
+from .model import UniqueSlugs
+from .render import render_full_bible, render_voice_card
+
+EXPORT_PREFIX = "charbible-export-"
+MAX_EXPORT_AGE = float(os.environ.get("CHARBIBLE_EXPORT_MAX_AGE", "3600"))
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object; zipfile writes data descriptors."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def persona_files(library, persona_ids, generated=None, manifest=None):
+    """Yield (arcname, bytes) for each persona's bible and voice card.
+
+    Appends one entry per persona to `manifest` (a list) if given.
+    """
+    generated = generated or date.today()
+    slugs = UniqueSlugs()
+    for persona_id in persona_ids:
+        bible = library.get(persona_id)
+        slug = slugs(bible.char_name)
+        files = {
+            f"bibles/bible_{slug}.md": render_full_bible(bible, generated).encode("utf-8"),
+            f"voice_cards/voicecard_{slug}.md": render_voice_card(bible).encode("utf-8"),
+        }
+        if manifest is not None:
+            manifest.append({
+                "id": persona_id,
+                "name": bible.char_name,
+                "files": {name: {"bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+                          for name, data in files.items()},
+            })
+        yield from files.items()
+
+
+def iter_zip(library, persona_ids, generated=None, progress=None):
+    """Yield the ZIP archive for `persona_ids` as byte chunks.
+
+    `progress(done, total)` is called after each persona.
+    """
+    persona_ids = list(persona_ids)
+    generated = generated or date.today()
+    manifest = []
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for n, (name, data) in enumerate(persona_files(library, persona_ids, generated, manifest), 1):
+            zf.writestr(name, data)
+            yield from sink.drain()
+            if progress and n % 2 == 0:
+                progress(n // 2, len(persona_ids))
+        zf.writestr("manifest.json", json.dumps({
+            "generated": generated.isoformat(),
+            "count": len(manifest),
+            "personas": manifest,
+        }, indent=2, ensure_ascii=False))
+    yield from sink.drain()
+
+
+def sweep_exports(max_age=MAX_EXPORT_AGE, directory=None):
+    """Delete export archives last written more than `max_age` seconds ago. Returns how many."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(directory or tempfile.gettempdir()):
+        if not (entry.name.startswith(EXPORT_PREFIX) and entry.name.endswith(".zip")):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass  # gone already, or another process's
+    return removed
+
+
+class ExportJob:
+    """Build an export archive on a background thread, spooled to disk."""
+
+    def __init__(self, library, persona_ids, generated=None):
+        sweep_exports()
+        self.total = len(persona_ids)
+        self.done = 0
+        self.bytes = 0
+        self.error = None
+        fd, self.path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=".zip")
+        os.close(fd)
+        self._thread = threading.Thread(
+            target=self._run, args=(library, list(persona_ids), generated),
+            name="charbible-export", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    @property
+    def expired(self):
+        """Finished, but the archive has since been swept from disk."""
+        return not self.running and not os.path.exists(self.path)
+
+    def _progress(self, done, total):
+        self.done = done
+
+    def _run(self, library, persona_ids, generated):
+        try:
+            with open(self.path, "wb") as fh:
+                for chunk in iter_zip(library, persona_ids, generated, self._progress):
+                    fh.write(chunk)
+                    self.bytes += len(chunk)
+            self.done = self.total
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    def read(self):
+        with open(self.path, "rb") as fh:
+            return fh.read()
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,220 @@
+"""
+Budgeted voice card: fit the card to a token or word budget.
+
+The card is built as prioritised items under the usual voice card headings.
+Items repeated across fields are deduplicated, empty items and sections are
+dropped, and if the card is still over budget the least important items are
+first cut to their opening sentence and then removed. Guardrails (NEVER DO)
+and the core essence are never cut. The result reports what was removed.
+
+Token counts are a tokenizer-free estimate that tracks BPE tokenizers well
+enough for budgeting English prompts; words are whitespace-separated.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+UNITS = ("tokens", "words")
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_NORMALIZE = re.compile(r"[^\w]+")
+
+KEEP = 1  # items at or below this priority are never shortened or dropped
+
+
+def count_tokens(text):
+    """Estimated tokens: roughly one per six letters of a word, one per symbol."""
+    return sum((len(piece) + 5) // 6 if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in _PIECE.findall(text))
+
+
+def count_words(text):
+    return len(text.split())
+
+
+COUNTERS = {"tokens": count_tokens, "words": count_words}
+
+
+@dataclass
+class _Item:
+    section: str
+    text: str
+    priority: int
+    prefix: str = "- "
+    suffix: str = ""
+
+    def line(self, number=None):
+        prefix = f"{number}. " if number is not None else self.prefix
+        return f"{prefix}{self.text}{self.suffix}"
+
+
+@dataclass
+class BudgetReport:
+    budget: int
+    unit: str
+    full: int  # size of the deduplicated card before trimming
+    final: int
+    deduplicated: list = field(default_factory=list)  # (section, text)
+    shortened: list = field(default_factory=list)
+    dropped: list = field(default_factory=list)
+
+    @property
+    def fits(self):
+        return self.final <= self.budget
+
+    @property
+    def saved(self):
+        return self.full - self.final
+
+
+# (heading, layout) in card order. Layout "paragraph" joins items with a
+# space; "numbered" renumbers the surviving items; "list" prints each line.
+SECTIONS = (
+    ("CORE ESSENCE", "paragraph"),
+    ("VOICE & TONE", "list"),
+    ("SPEECH PATTERNS", "list"),
+    ("SIGNATURE PHRASES", "list"),
+    ("REFERENCE WORLDS", "list"),
+    ("OPINIONS & HOT TAKES", "numbered"),
+    ("PET PEEVES", "list"),
+    ("CONTRADICTIONS", "list"),
+    ("EXPERTISE & GAPS", "list"),
+    ("EMOTIONAL CUES", "list"),
+    ("NEVER DO THIS", "list"),
+)
+LAYOUTS = dict(SECTIONS)
+
+
+def _tiered(values, tiers):
+    """Priorities for a list: tiers is ((count, priority), ...), the rest get +1."""
+    out = []
+    for value in values:
+        for count, priority in tiers:
+            if len(out) < count:
+                break
+        else:
+            priority = tiers[-1][1] + 1
+        out.append((value, priority))
+    return out
+
+
+def _items(bible):
+    items = []
+
+    def add(section, text, priority, prefix="- ", suffix=""):
+        items.append(_Item(section, text.strip(), priority, prefix, suffix))
+
+    add("CORE ESSENCE", bible.one_liner, 0, "")
+    add("CORE ESSENCE", bible.the_contradiction, 1, "")
+    for label, key, priority in (("Voice", "voice_description", 1), ("Tone", "tone", 2),
+                                 ("Style Keywords", "style_keywords", 3), ("Analogy", "voice_analogy", 4)):
+        add("VOICE & TONE", getattr(bible, key), priority, f"- **{label}:** ")
+    for label, key, priority in (("Sentence structure", "sentence_structure", 3),
+                                 ("Verbal tics", "verbal_tics", 3),
+                                 ("Starts with", "how_they_start", 4), ("Ends with", "how_they_end", 4)):
+        add("SPEECH PATTERNS", getattr(bible, key), priority, f"- **{label}:** ")
+    for phrase, priority in _tiered(bible.lines("signature_phrases"), ((3, 2), (8, 4), (12, 5))):
+        add("SIGNATURE PHRASES", phrase, priority, '- "', '"')
+    for label, key, priority in (("Primary", "reference_primary", 3), ("Secondary", "reference_secondary", 5),
+                                 ("Never references", "reference_never", 4)):
+        add("REFERENCE WORLDS", getattr(bible, key), priority, f"- **{label}:** ")
+    for opinion, priority in _tiered([o for o in bible.numbered("opinion", 7) if o.strip()], ((3, 3), (5, 5))):
+        add("OPINIONS & HOT TAKES", opinion, priority)
+    for peeve, priority in _tiered(bible.lines("pet_peeves"), ((2, 4), (5, 5))):
+        add("PET PEEVES", peeve, priority)
+    for contradiction, priority in _tiered([c for c in bible.numbered("contradiction", 5) if c.strip()],
+                                           ((2, 4), (3, 5))):
+        add("CONTRADICTIONS", contradiction, priority)
+    for label, key, priority in (("Knows cold", "knows_cold", 4), ("Thinks they know", "thinks_knows", 6),
+                                 ("Surprising gaps", "knowledge_gaps", 6)):
+        add("EXPERTISE & GAPS", getattr(bible, key), priority, f"- **{label}:** ")
+    for label, key, priority in (("Lights up when", "lights_up", 5), ("Shuts down when", "shuts_down", 5),
+                                 ("Resting state", "resting_state", 6)):
+        add("EMOTIONAL CUES", getattr(bible, key), priority, f"- **{label}:** ")
+    for never in bible.lines("never_do"):
+        add("NEVER DO THIS", never.lstrip("- "), KEEP, "- Never: ")
+    return [item for item in items if item.text]
+
+
+def _dedupe(items):
+    """Drop items whose normalised text already appeared in a more important item."""
+    seen = set()
+    kept, dropped = [], []
+    for item in sorted(items, key=lambda item: item.priority):
+        key = _NORMALIZE.sub(" ", item.text.casefold()).strip()
+        if key in seen:
+            dropped.append(item)
+        else:
+            seen.add(key)
+            kept.append(item)
+    kept_ids = {id(item) for item in kept}
+    return [item for item in items if id(item) in kept_ids], dropped
+
+
+def _render(title, items):
+    out = [f"# {title} — Voice Card\n"]
+    for heading, layout in SECTIONS:
+        section = [item for item in items if item.section == heading]
+        if not section:
+            continue
+        out.append(f"\n## {heading}\n")
+        if layout == "paragraph":
+            out.append(" ".join(item.text for item in section) + "\n")
+        else:
+            for n, item in enumerate(section, 1):
+                out.append(item.line(n if layout == "numbered" else None) + "\n")
+    return "".join(out)
+
+
+def _first_sentence(text):
+    parts = _SENTENCE_END.split(text, maxsplit=1)
+    return parts[0] if len(parts) > 1 else None
+
+
+def _cost(item, count):
+    """Size of one item's line. Both counters are additive across whitespace."""
+    layout = LAYOUTS[item.section]
+    if layout == "paragraph":
+        return count(item.text)
+    return count(item.line(1 if layout == "numbered" else None))
+
+
+def budgeted_voice_card(bible, budget, unit="tokens"):
+    """Return (card markdown, BudgetReport) with the card cut to fit `budget` `unit`."""
+    count = COUNTERS[unit]
+    title = bible.char_name or "CHARACTER"
+    items, duplicates = _dedupe(_items(bible))
+    report = BudgetReport(budget, unit, full=count(_render(title, items)), final=0,
+                          deduplicated=[(item.section, item.text) for item in duplicates])
+
+    size = report.full
+    remaining = {heading: 0 for heading, _ in SECTIONS}
+    for item in items:
+        remaining[item.section] += 1
+    for priority in range(max((item.priority for item in items), default=0), KEEP, -1):
+        if size <= budget:
+            break
+        tier = [item for item in items if item.priority == priority]
+        for item in reversed(tier):
+            if size <= budget:
+                break
+            shorter = _first_sentence(item.text)
+            if shorter:
+                report.shortened.append((item.section, item.text))
+                before = _cost(item, count)
+                item.text = shorter
+                size -= before - _cost(item, count)
+        for item in reversed(tier):
+            if size <= budget:
+                break
+            items.remove(item)
+            report.dropped.append((item.section, item.text))
+            size -= _cost(item, count)
+            remaining[item.section] -= 1
+            if not remaining[item.section]:
+                size -= count(f"## {item.section}")
+
+    text = _render(title, items)
+    report.final = count(text)
+    return text, report
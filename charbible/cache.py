@@ -0,0 +1,89 @@
+"""
+Process-wide memoization of rendered outputs.
+
+Renders are keyed by the persona's content hash, so a rerun where no field
+changed costs one dictionary lookup. The cache is a module global and is
+therefore shared by every Streamlit session served by this process.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from .budget import budgeted_voice_card
+from .render import render_full_bible, render_voice_card
+
+
+class LRUCache:
+    """A small thread-safe LRU with hit/miss counters."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        # Render outside the lock; a concurrent miss on the same key just
+        # renders twice and stores identical text.
+        value = factory()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+RENDER_CACHE = LRUCache(maxsize=512)
+
+
+def memoized_full_bible(bible, generated=None, digest=None, cache=RENDER_CACHE, canonical=False):
+    """render_full_bible, memoized. Pass `digest` if you already hashed the bible."""
+    if canonical:
+        key = ("bible", digest or bible.content_hash(), "canonical")
+        return cache.get_or_create(key, lambda: render_full_bible(bible, canonical=True))
+    generated = generated or date.today()
+    key = ("bible", digest or bible.content_hash(), generated.isoformat())
+    return cache.get_or_create(key, lambda: render_full_bible(bible, generated))
+
+
+def memoized_voice_card(bible, digest=None, cache=RENDER_CACHE, canonical=False):
+    """render_voice_card, memoized. Pass `digest` if you already hashed the bible."""
+    key = ("voice_card", digest or bible.content_hash(), canonical)
+    return cache.get_or_create(key, lambda: render_voice_card(bible, canonical))
+
+
+def memoized_budgeted_voice_card(bible, budget, unit="tokens", digest=None, cache=RENDER_CACHE,
+                                 canonical=False):
+    """budgeted_voice_card, memoized. Returns (text, BudgetReport); treat the report as read-only."""
+    key = ("voice_card_budget", digest or bible.content_hash(), budget, unit, canonical)
+    return cache.get_or_create(
+        key, lambda: budgeted_voice_card(bible.canonical() if canonical else bible, budget, unit))
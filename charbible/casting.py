@@ -0,0 +1,216 @@
+"""
+Casting: which saved persona is closest to a show brief (TF-IDF, cosine).
+
+Each library persona becomes one sparse TF-IDF row. Fields are grouped by
+weight; term frequencies are counted per group (1 + log tf) and multiplied
+by the group's weight before they are summed, so "compost" in knows_cold
+counts for more than "compost" in vices. A brief is vectorized against the
+same vocabulary and IDF, and all personas are scored with one sparse matrix
+product; several briefs at once are still one product.
+
+Saving a persona tokenizes only that persona. The matrix, document
+frequencies and row norms are rebuilt with vectorized numpy on the next
+query after a change, which is linear in the number of non-zeros.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from .library import LibraryFollower
+from .schema import FIELD_KEYS
+
+DEFAULT_WEIGHT = 0.5  # every field not listed below
+FIELD_WEIGHTS = {
+    "char_name": 0.0,  # a brief never names the persona it wants
+    "knows_cold": 3.0,
+    "niche_interests": 2.5,
+    "content_category": 2.5,
+    "style_keywords": 2.0,
+    "tone": 2.0,
+    "char_role": 2.0,
+    "one_liner": 1.5,
+    "podcast_description": 1.5,
+    "voice_description": 1.0,
+    "thinks_knows": 1.0,
+}
+
+_TOKEN = re.compile(r"([^\W_]{2,})(?:'s)?")  # "nigel's" -> "nigel"; "don't" -> "don"
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each even every few for from
+further get gets got had has have having he her here hers him his how i if in into is it its itself
+just like ll me more most much my no nor not now of off often on once only or other our ours out
+over own re really same she should so some such than that the their theirs them then there these
+they this those through to too under until up us very was we were what when where which while who
+whom why will with would you your yours
+""".split())
+
+
+class _AccentFold(dict):
+    """str.translate table: "ê" -> "e", "’" -> "'"; filled in one character at a time as they turn up."""
+
+    def __missing__(self, code):
+        folded = "".join(c for c in unicodedata.normalize("NFKD", chr(code)) if not unicodedata.combining(c))
+        self[code] = folded
+        return folded
+
+
+_FOLD = _AccentFold({ord("’"): "'", ord("‘"): "'", ord("ʼ"): "'"})
+
+
+def tokens(text):
+    """Lowercase terms without accents ("fête" -> "fete"), stop words dropped."""
+    text = text.lower()
+    if not text.isascii():
+        text = text.translate(_FOLD)
+    return [token for token in _TOKEN.findall(text) if token not in STOP_WORDS]
+
+
+def _sparse():
+    try:
+        import scipy.sparse
+    except ImportError as e:
+        raise RuntimeError("casting needs SciPy: pip install scipy") from e
+    return scipy.sparse
+
+
+@dataclass(frozen=True)
+class Match:
+    persona_id: int
+    name: str
+    score: float  # cosine similarity, 0..1
+    terms: tuple  # the brief's words that contributed most
+
+
+class CastingIndex:
+    """Per-process TF-IDF index over the library. Thread-safe; shared by sessions."""
+
+    def __init__(self, weights=FIELD_WEIGHTS, default_weight=DEFAULT_WEIGHT):
+        self.weights = {key: weights.get(key, default_weight) for key in FIELD_KEYS}
+        self._groups = {}  # weight -> field keys, tokenized together
+        for key, weight in self.weights.items():
+            if weight:
+                self._groups.setdefault(weight, []).append(key)
+        self.vocabulary = {}  # term -> column
+        self._terms = []      # column -> term
+        self._rows = {}       # persona id -> (name, columns, weighted tf)
+        self._matrix = None   # (ids, names, rows csr, terms csr, idf), rebuilt after changes
+        self._lock = threading.Lock()
+        self._follower = LibraryFollower(self.add, self.remove)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, persona_id, bible):
+        """Index (or re-index) one persona."""
+        weighted = Counter()
+        for weight, keys in self._groups.items():
+            text = "\n".join(getattr(bible, key) for key in keys)
+            for term, count in Counter(tokens(text)).items():
+                weighted[term] += weight * (1 + math.log(count))
+        with self._lock:
+            columns = np.fromiter((self._column(term) for term in weighted), dtype=np.int64, count=len(weighted))
+            self._rows[persona_id] = (bible.char_name, columns, np.fromiter(weighted.values(), dtype=np.float64))
+            self._matrix = None
+
+    def remove(self, persona_id):
+        with self._lock:
+            if self._rows.pop(persona_id, None) is not None:
+                self._matrix = None
+
+    @property
+    def ready(self):
+        """False until the first sync or follow() pass has indexed the whole library."""
+        return self._follower.synced
+
+    def sync(self, library):
+        """Pick up personas saved, changed or deleted elsewhere (other sessions, ingest)."""
+        self._follower.poll(library)
+
+    def follow(self, library, interval=5.0):
+        """Sync from a daemon thread every `interval` seconds; queries then never tokenize the library.
+
+        The matrix is still built by the first query after a change: it is
+        cheap (vectorized, linear in the non-zeros), and building it imports
+        SciPy, which stays off the thread (importing it runs ast.parse, which
+        on CPython < 3.11.8 can fail beside Streamlit compiling a script).
+        """
+        self._follower.follow(library, interval, name="charbible-casting")
+
+    def _column(self, term):
+        column = self.vocabulary.get(term)
+        if column is None:
+            column = self.vocabulary[term] = len(self._terms)
+            self._terms.append(term)
+        return column
+
+    def _build(self):
+        sparse = _sparse()
+        ids = list(self._rows)
+        rows = [self._rows[persona_id] for persona_id in ids]
+        size = len(self._terms)
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(columns) for _, columns, _ in rows], out=indptr[1:])
+        indices = np.concatenate([columns for _, columns, _ in rows]) if rows else np.zeros(0, np.int64)
+        data = np.concatenate([tf for _, _, tf in rows]) if rows else np.zeros(0)
+        df = np.bincount(indices, minlength=size)
+        idf = np.log((1 + len(rows)) / (1 + df)) + 1.0
+        data = data * idf[indices]
+        lengths = np.diff(indptr)
+        # bincount, not add.reduceat: personas with no weighted terms (only a name) are empty rows
+        norms = np.sqrt(np.bincount(np.repeat(np.arange(len(rows)), lengths), weights=data * data,
+                                    minlength=len(rows)))
+        norms[norms == 0] = 1.0
+        data /= np.repeat(norms, lengths)
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(rows), size))
+        # queries multiply against terms x personas; transposing per query costs more than the product
+        return ids, [name for name, _, _ in rows], matrix, matrix.T.tocsr(), idf
+
+    def search(self, brief, k=5):
+        return self.search_many([brief], k)[0]
+
+    def search_many(self, briefs, k=5):
+        """[[Match, ...] per brief]: the top `k` personas by cosine similarity."""
+        sparse = _sparse()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = self._build()
+            ids, names, matrix, by_term, idf = self._matrix
+            vocabulary = self.vocabulary
+            terms = self._terms
+        if not ids:
+            return [[] for _ in briefs]
+
+        indptr, indices, data = [0], [], []
+        for brief in briefs:
+            counts = Counter(term for term in tokens(brief) if vocabulary.get(term, len(idf)) < len(idf))
+            indices.extend(vocabulary[term] for term in counts)
+            data.extend(1 + math.log(count) for count in counts.values())
+            indptr.append(len(indices))
+        indices = np.array(indices, dtype=np.int64)
+        data = np.array(data, dtype=np.float64) * idf[indices]
+        queries = sparse.csr_matrix((data, indices, indptr), shape=(len(briefs), len(idf)))
+        norms = np.sqrt(np.asarray(queries.multiply(queries).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        queries = sparse.diags(1 / norms) @ queries
+
+        scores = (queries @ by_term).toarray()
+        results = []
+        for row, query in zip(scores, queries):
+            top = np.argpartition(-row, k)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(-row[top])]
+            top = top[row[top] > 0]
+            # each match's share of the score, per brief term: a (matches, brief terms) slice
+            contribution = matrix[top][:, query.indices].toarray() * query.data
+            results.append([
+                Match(ids[index], names[index], round(float(row[index]), 3),
+                      tuple(terms[query.indices[i]] for i in np.argsort(-shares)[:5] if shares[i] > 0))
+                for index, shares in zip(top, contribution)
+            ])
+        return results
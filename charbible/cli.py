@@ -0,0 +1,615 @@
+"""
+Command-line entry point: python -m charbible <command> ...
+
+    render   Render bibles, voice cards or any export format for JSONL/CSV records
+    scan     Score transcripts against a persona for voice drift and guardrail violations
+    formats  List export formats and check that each one round-trips
+    ingest   Load bible markdown, spreadsheets and persona files into the library
+    collisions  Report phrases that saved personas share, or check one persona against them
+    cast     Rank saved personas against show briefs (TF-IDF)
+    serve    Run the HTTP render service (see server.py)
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+from functools import partial
+
+from .formats import FORMATS, export, persona_from_record, roundtrip_errors
+from .model import CharacterBible, UniqueSlugs
+from .scan import DEFAULT_DRIFT_THRESHOLD, DEFAULT_TARGET_RATE, PersonaScanner
+
+DEFAULT_OUTPUTS = ("bible", "voice_card")
+
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+def iter_records(path):
+    """Yield (location, record) from a .jsonl/.csv file, or JSONL on stdin for '-'.
+
+    Records are read one at a time; a bad JSON line yields an Exception as the
+    record so the caller can report it against its line number.
+    """
+    if path == "-":
+        yield from _iter_jsonl(sys.stdin, "<stdin>")
+    elif path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row_no, row in enumerate(csv.DictReader(fh), 2):
+                yield f"{path}:{row_no}", row
+    else:
+        with open(path, encoding="utf-8") as fh:
+            yield from _iter_jsonl(fh, path)
+
+
+def _iter_jsonl(fh, name):
+    for line_no, line in enumerate(fh, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = e
+        yield f"{name}:{line_no}", record
+
+
+TRANSCRIPT_SUFFIXES = (".txt", ".md")
+
+
+def iter_transcripts(path):
+    """Yield (episode, text, file path) from a transcript file, directory or JSONL.
+
+    Plain files are yielded by path with text None and read in the worker, so
+    the parent never holds transcript text. JSONL records need "text" and may
+    carry an "episode" or "id"; a bad record yields an Exception as its text.
+    """
+    if path == "-":
+        yield from _jsonl_transcripts(_iter_jsonl(sys.stdin, "<stdin>"))
+    elif path.lower().endswith(".jsonl"):
+        with open(path, encoding="utf-8") as fh:
+            yield from _jsonl_transcripts(_iter_jsonl(fh, path))
+    elif os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(TRANSCRIPT_SUFFIXES):
+                    full = os.path.join(root, name)
+                    yield os.path.relpath(full, path), None, full
+    else:
+        yield os.path.basename(path), None, path
+
+
+def _jsonl_transcripts(records):
+    for location, record in records:
+        if isinstance(record, dict) and isinstance(record.get("text"), str):
+            yield record.get("episode") or record.get("id") or location, record["text"], None
+        elif isinstance(record, Exception):
+            yield location, record, None
+        else:
+            yield location, ValueError('expected an object with a "text" string'), None
+
+
+# Files parsed whole in a worker, by suffix -> export format
+INGEST_SUFFIXES = {".md": "bible", ".json": "persona", ".yaml": "yaml", ".yml": "yaml"}
+RECORD_SUFFIXES = (".csv", ".jsonl")
+
+
+def iter_ingest(path):
+    """Yield (location, record, file path, format) for everything `path` holds.
+
+    Markdown, JSON and YAML files are yielded by path and parsed in the
+    worker; CSV and JSONL rows are yielded as records. Anything unreadable
+    yields an Exception as its record.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                suffix = os.path.splitext(name)[1].lower()
+                if suffix in INGEST_SUFFIXES or suffix in RECORD_SUFFIXES:
+                    yield from iter_ingest(os.path.join(root, name))
+        return
+    suffix = os.path.splitext(path)[1].lower()
+    if path == "-" or suffix in RECORD_SUFFIXES:
+        for location, record in iter_records(path):
+            yield location, record, None, None
+    elif suffix in INGEST_SUFFIXES:
+        yield path, None, path, INGEST_SUFFIXES[suffix]
+    else:
+        yield path, ValueError(f"can't ingest {suffix or 'a file without a suffix'}"), None, None
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Work
+# ---------------------------------------------------------------------------
+
+def _run_batches(work, batches, workers, collect, initializer=None, initargs=()):
+    """Run `work(batch)` for every batch, in-process or across a process pool.
+
+    At most `workers * 2` batches are in flight, so memory stays flat however
+    large the input is.
+    """
+    if workers <= 1:
+        if initializer:
+            initializer(*initargs)
+        for batch in batches:
+            collect(work(batch))
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = set()
+        for batch in batches:
+            pending.add(pool.submit(work, batch))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result())
+        for future in pending:
+            collect(future.result())
+
+
+def render_batch(batch, out_dir, kinds, generated, strict=False, canonical=False):
+    """Render and write one batch. Runs in a worker process.
+
+    Returns [(location, error or None, bytes_written)].
+    """
+    results = []
+    for location, stem, record in batch:
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(f"invalid JSON: {record}")
+            if not isinstance(record, dict):
+                raise ValueError(f"expected an object, got {type(record).__name__}")
+            bible = CharacterBible.from_mapping(record)
+            if strict and bible.missing_required():
+                raise ValueError(f"missing required fields: {', '.join(bible.missing_required())}")
+            written = 0
+            for kind, text in export(bible, kinds, generated, canonical).items():
+                data = text.encode("utf-8")
+                with open(os.path.join(out_dir, FORMATS[kind].filename.format(stem)), "wb") as fh:
+                    fh.write(data)
+                written += len(data)
+            results.append((location, None, written))
+        except Exception as e:
+            results.append((location, f"{type(e).__name__}: {e}", 0))
+    return results
+
+
+def run_render(paths, out_dir, kinds=DEFAULT_OUTPUTS, workers=None, batch_size=64,
+               generated=None, strict=False, errors=None, log=sys.stderr, canonical=False):
+    """Stream records from `paths`, render across a process pool, write as we go.
+
+    Returns a stats dict.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    generated = generated or date.today()
+    workers = os.cpu_count() if workers is None else workers
+    stems = UniqueSlugs()
+    stats = {"records": 0, "ok": 0, "failed": 0, "bytes": 0}
+    started = time.perf_counter()
+
+    records = (
+        (loc, stems(rec.get("char_name") if isinstance(rec, dict) else None), rec)
+        for path in paths for loc, rec in iter_records(path)
+    )
+    batches = _batched(records, batch_size)
+
+    def collect(results):
+        for location, error, written in results:
+            stats["records"] += 1
+            if error:
+                stats["failed"] += 1
+                print(f"{location}: {error}", file=log)
+                if errors:
+                    errors.write(json.dumps({"location": location, "error": error}) + "\n")
+            else:
+                stats["ok"] += 1
+                stats["bytes"] += written
+
+    _run_batches(partial(render_batch, out_dir=out_dir, kinds=kinds, generated=generated, strict=strict,
+                         canonical=canonical),
+                 batches, workers, collect)
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["records_per_sec"] = round(stats["records"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
+
+
+INGEST_COMMIT_EVERY = 500  # personas per library transaction
+
+
+def _parse_persona_file(text, fmt):
+    # Plain {field: value} objects are accepted as well as persona exports
+    return json.loads(text) if fmt == "persona" else FORMATS[fmt].load(text)
+
+
+def ingest_batch(batch, strict=False):
+    """Parse and validate one batch. Runs in a worker process.
+
+    Returns [(location, field values or None, error or None)].
+    """
+    results = []
+    for location, record, path, fmt in batch:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if path is not None:
+                with open(path, encoding="utf-8") as fh:
+                    record = _parse_persona_file(fh.read(), fmt)
+            results.append((location, persona_from_record(record, strict).to_dict(), None))
+        except Exception as e:
+            results.append((location, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def run_ingest(paths, library, workers=None, batch_size=64, strict=False, errors=None, log=sys.stderr):
+    """Stream persona files from `paths`, parse across a process pool, save to `library`.
+
+    Saves are batched into transactions of INGEST_COMMIT_EVERY personas; with
+    `library` None nothing is saved (a dry run). A persona identical to one
+    already in the library, or earlier in this run, is counted as a
+    duplicate and not saved again. Returns a stats dict.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    stats = {"records": 0, "ok": 0, "failed": 0, "duplicates": 0}
+    known = set(library.content_hashes()) if library is not None else set()
+    pending = []
+    started = time.perf_counter()
+
+    def flush():
+        if library is not None and pending:
+            library.save_many([CharacterBible(**values) for values in pending])
+        stats["ok"] += len(pending)
+        pending.clear()
+
+    def collect(results):
+        for location, values, error in results:
+            stats["records"] += 1
+            if error:
+                stats["failed"] += 1
+                print(f"{location}: {error}", file=log)
+                if errors:
+                    errors.write(json.dumps({"location": location, "error": error}) + "\n")
+            else:
+                digest = CharacterBible(**values).content_hash()
+                if digest in known:
+                    stats["duplicates"] += 1
+                    continue
+                known.add(digest)
+                pending.append(values)
+                if len(pending) >= INGEST_COMMIT_EVERY:
+                    flush()
+
+    items = (item for path in paths for item in iter_ingest(path))
+    _run_batches(partial(ingest_batch, strict=strict), _batched(items, batch_size), workers, collect)
+    flush()
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["records_per_min"] = round(stats["records"] * 60 / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
+
+
+_scanner = None  # one per worker process, built by _init_scanner
+
+
+def _init_scanner(values, target_rate, drift_threshold):
+    global _scanner
+    _scanner = PersonaScanner(CharacterBible.from_mapping(values), target_rate, drift_threshold)
+
+
+def scan_batch(batch):
+    """Scan one batch with this process's scanner. Runs in a worker process."""
+    results = []
+    for episode, text, path in batch:
+        try:
+            if isinstance(text, Exception):
+                raise ValueError(f"invalid record: {text}")
+            if path is not None:
+                with open(path, encoding="utf-8", errors="replace") as fh:
+                    text = fh.read()
+            results.append(_scanner.scan(text, episode))
+        except Exception as e:
+            results.append({"episode": episode, "status": "error", "error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+def run_scan(persona, paths, out, workers=None, batch_size=32, target_rate=DEFAULT_TARGET_RATE,
+             drift_threshold=DEFAULT_DRIFT_THRESHOLD):
+    """Score every transcript in `paths` against `persona` (a field mapping).
+
+    Writes one JSON line per episode to `out` and returns summary stats.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    stats = {"episodes": 0, "ok": 0, "drift": 0, "violation": 0, "error": 0, "words": 0}
+    drift_total = 0.0
+    started = time.perf_counter()
+
+    def collect(results):
+        nonlocal drift_total
+        for result in results:
+            stats["episodes"] += 1
+            stats[result["status"]] += 1
+            stats["words"] += result.get("words", 0)
+            drift_total += result.get("drift") or 0.0
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    transcripts = (item for path in paths for item in iter_transcripts(path))
+    _run_batches(scan_batch, _batched(transcripts, batch_size), workers, collect,
+                 _init_scanner, (dict(persona), target_rate, drift_threshold))
+
+    scored = stats["episodes"] - stats["error"]
+    stats["mean_drift"] = round(drift_total / scored, 3) if scored else None
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["episodes_per_min"] = round(stats["episodes"] * 60 / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
+
+
+def load_persona(spec, db_path=None):
+    """Field values from a JSON file (fields or a persona export), 'preset:<id>' or 'library:<id>'.
+
+    Raises ValueError, KeyError or OSError if there is no usable persona there.
+    """
+    if spec.startswith("preset:"):
+        from .presets import PresetPack
+        return PresetPack().fields(spec.split(":", 1)[1])
+    if spec.startswith("library:"):
+        from .drafts import DEFAULT_DB_PATH
+        from .library import Library
+        return Library(db_path or DEFAULT_DB_PATH).get(int(spec.split(":", 1)[1])).to_dict()
+    with open(spec, encoding="utf-8") as fh:
+        return persona_from_record(json.load(fh)).to_dict()
+
+
+def _load_persona_arg(args):
+    """load_persona(args.persona), or None after printing why there's no persona there."""
+    try:
+        return load_persona(args.persona, args.db)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"{args.persona}: no persona to check against ({type(e).__name__}: {e})", file=sys.stderr)
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+
+def cmd_render(args):
+    kinds = tuple(args.only) if args.only else DEFAULT_OUTPUTS
+    if args.canonical and args.date:
+        print("--canonical output carries no date; drop --date", file=sys.stderr)
+        return 2
+    generated = date.fromisoformat(args.date) if args.date else None
+    errors = open(args.errors, "w", encoding="utf-8") if args.errors else None
+    try:
+        stats = run_render(args.inputs, args.out, kinds, args.workers, args.batch_size,
+                           generated, args.strict, errors, canonical=args.canonical)
+    finally:
+        if errors:
+            errors.close()
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+def cmd_scan(args):
+    persona = _load_persona_arg(args)
+    if persona is None:
+        return 2
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        stats = run_scan(persona, args.inputs, out, args.workers, args.batch_size,
+                         args.target_rate, args.drift_threshold)
+    finally:
+        if args.out:
+            out.close()
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats["violation"] or stats["error"] else 0
+
+
+def cmd_formats(args):
+    for fmt in FORMATS.values():
+        print(f"{fmt.name:12} {fmt.filename:20} {fmt.mime:18} {'read/write' if fmt.load else 'write'}")
+    if not args.check:
+        return 0
+    if args.inputs:
+        records = ((loc, rec) for path in args.inputs for loc, rec in iter_records(path))
+    else:
+        from .presets import PresetPack
+        pack = PresetPack()
+        records = ((f"preset:{p.id}", dict(pack.fields(p.id))) for p in pack)
+    failed = checked = 0
+    for location, record in records:
+        if not isinstance(record, dict):
+            continue
+        checked += 1
+        errors = roundtrip_errors(CharacterBible.from_mapping(record))
+        if errors:
+            failed += 1
+            print(f"{location}: " + ", ".join(f"{fmt}:{key}" for fmt, key in errors), file=sys.stderr)
+    print(json.dumps({"checked": checked, "failed": failed}), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_ingest(args):
+    library = None
+    if not args.dry_run:
+        from .drafts import DEFAULT_DB_PATH
+        from .library import Library
+        library = Library(args.db or DEFAULT_DB_PATH)
+    errors = open(args.errors, "w", encoding="utf-8") if args.errors else None
+    try:
+        stats = run_ingest(args.inputs, library, args.workers, args.batch_size, args.strict, errors)
+    finally:
+        if errors:
+            errors.close()
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+def _phrase_json(phrase):
+    return {"persona_id": phrase.owner, "name": phrase.name, "field": phrase.field, "text": phrase.text}
+
+
+def cmd_collisions(args):
+    from .collisions import PhraseIndex
+    from .drafts import DEFAULT_DB_PATH
+    from .library import Library
+
+    persona = _load_persona_arg(args) if args.persona else None
+    if args.persona and persona is None:
+        return 2
+    started = time.perf_counter()
+    index = PhraseIndex(args.threshold)
+    index.sync(Library(args.db or DEFAULT_DB_PATH))
+    indexed = time.perf_counter()
+    if args.persona:
+        bible = CharacterBible.from_mapping(persona)
+        owner = int(args.persona.split(":", 1)[1]) if args.persona.startswith("library:") else None
+        found = index.check(bible, owner)
+        for collision in found:
+            print(json.dumps({"field": collision.phrase.field, "text": collision.phrase.text,
+                              "similarity": collision.similarity,
+                              "matches": [_phrase_json(p) for p in collision.others]}, ensure_ascii=False))
+    else:
+        found = index.report()
+        for group in found:
+            print(json.dumps({"personas": len({p.owner for p in group}),
+                              "phrases": [_phrase_json(p) for p in group]}, ensure_ascii=False))
+    print(json.dumps({"phrases_indexed": len(index), "found": len(found),
+                      "index_seconds": round(indexed - started, 3),
+                      "query_seconds": round(time.perf_counter() - indexed, 3)}), file=sys.stderr)
+    return 1 if found else 0
+
+
+def cmd_cast(args):
+    from .casting import CastingIndex
+    from .drafts import DEFAULT_DB_PATH
+    from .library import Library
+
+    briefs = args.briefs or [line.strip() for line in sys.stdin if line.strip()]
+    started = time.perf_counter()
+    index = CastingIndex()
+    index.sync(Library(args.db or DEFAULT_DB_PATH))
+    indexed = time.perf_counter()
+    results = index.search_many(briefs, args.k)  # every brief in one matrix product
+    for brief, matches in zip(briefs, results):
+        print(json.dumps({"brief": brief, "matches": [
+            {"persona_id": m.persona_id, "name": m.name, "score": m.score, "terms": list(m.terms)}
+            for m in matches]}, ensure_ascii=False))
+    print(json.dumps({"personas_indexed": len(index), "vocabulary": len(index.vocabulary),
+                      "briefs": len(briefs), "index_seconds": round(indexed - started, 3),
+                      "query_seconds": round(time.perf_counter() - indexed, 3)}), file=sys.stderr)
+    return 0
+
+
+def cmd_serve(args):
+    import asyncio
+
+    from .server import serve
+
+    def ready(address):
+        print(f"charbible render service on http://{address[0]}:{address[1]}", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.queue, ready))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="charbible", description="Character Bible tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("render", help="render bibles and voice cards from JSONL/CSV records")
+    p.add_argument("inputs", nargs="+", help=".jsonl or .csv files ('-' for JSONL on stdin)")
+    p.add_argument("-o", "--out", required=True, help="output directory")
+    p.add_argument("--only", action="append", choices=sorted(FORMATS),
+                   help="render this format instead of bible + voice_card (repeatable)")
+    p.add_argument("-j", "--workers", type=int, default=None,
+                   help="worker processes (default: CPU count; 1 = in-process)")
+    p.add_argument("--batch-size", type=int, default=64, help="records per worker task")
+    p.add_argument("--date", help="date stamped into bibles, YYYY-MM-DD (default: today)")
+    p.add_argument("--canonical", action="store_true",
+                   help="byte-stable output: normalised whitespace, no date (same persona, same bytes)")
+    p.add_argument("--strict", action="store_true", help="fail records missing required fields")
+    p.add_argument("--errors", help="also write per-record errors to this JSONL file")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("scan", help="score transcripts for voice drift and guardrail violations")
+    p.add_argument("persona", help="persona JSON file, preset:<id> or library:<id>")
+    p.add_argument("inputs", nargs="+",
+                   help="transcript files, directories of .txt/.md, or .jsonl with a 'text' field ('-' for stdin)")
+    p.add_argument("-o", "--out", help="write per-episode JSONL here (default: stdout)")
+    p.add_argument("-j", "--workers", type=int, default=None,
+                   help="worker processes (default: CPU count; 1 = in-process)")
+    p.add_argument("--batch-size", type=int, default=32, help="transcripts per worker task")
+    p.add_argument("--target-rate", type=float, default=DEFAULT_TARGET_RATE,
+                   help="voice hits per 1000 words that count as fully on-voice")
+    p.add_argument("--drift-threshold", type=float, default=DEFAULT_DRIFT_THRESHOLD,
+                   help="drift above this marks an episode as drifting")
+    p.add_argument("--db", help="library database for library:<id> (default: CHARBIBLE_DB)")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("formats", help="list export formats; --check round-trips personas through each")
+    p.add_argument("--check", action="store_true",
+                   help="round-trip personas through every readable format (default: the preset pack)")
+    p.add_argument("inputs", nargs="*", help=".jsonl or .csv personas to check")
+    p.set_defaults(func=cmd_formats)
+
+    p = sub.add_parser("ingest", help="load bible_*.md, CSV/JSONL and persona JSON/YAML into the library")
+    p.add_argument("inputs", nargs="+",
+                   help="files or directories of .md/.csv/.jsonl/.json/.yaml ('-' for JSONL on stdin)")
+    p.add_argument("--db", help="library database (default: CHARBIBLE_DB)")
+    p.add_argument("-j", "--workers", type=int, default=None,
+                   help="worker processes (default: CPU count; 1 = in-process)")
+    p.add_argument("--batch-size", type=int, default=64, help="files or rows per worker task")
+    p.add_argument("--strict", action="store_true", help="reject personas missing required fields")
+    p.add_argument("--dry-run", action="store_true", help="parse and validate only; save nothing")
+    p.add_argument("--errors", help="also write failures as JSONL to this file")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("collisions", help="near-duplicate phrases across saved personas (MinHash/LSH)")
+    p.add_argument("persona", nargs="?",
+                   help="check only this persona (JSON file, preset:<id> or library:<id>) against the library")
+    p.add_argument("--db", help="library database (default: CHARBIBLE_DB)")
+    p.add_argument("--threshold", type=float, default=0.5,
+                   help="Jaccard similarity of character 5-grams that counts as a near-duplicate")
+    p.set_defaults(func=cmd_collisions)
+
+    p = sub.add_parser("cast", help="saved personas that best fit a show brief (TF-IDF, cosine)")
+    p.add_argument("briefs", nargs="*", help="brief text(s); omit to read one brief per line from stdin")
+    p.add_argument("-k", type=int, default=5, help="personas per brief")
+    p.add_argument("--db", help="library database (default: CHARBIBLE_DB)")
+    p.set_defaults(func=cmd_cast)
+
+    p = sub.add_parser("serve", help="serve renders over HTTP: POST persona JSON to /render/<format>")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8502)
+    p.add_argument("-j", "--workers", type=int, default=None,
+                   help="render processes (default: CPU count)")
+    p.add_argument("--queue", type=int, default=64,
+                   help="pending renders before new ones get 503")
+    p.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
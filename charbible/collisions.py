@@ -0,0 +1,285 @@
+"""
+Near-duplicate phrases across the persona library (MinHash + LSH).
+
+Each persona contributes short phrases: signature_phrases and taglines line
+by line, each opinion, and local_references sentence by sentence. A phrase
+is shingled into overlapping character 5-grams of its normalized text and
+summarised by a 64-value MinHash signature. The signature is cut into 16
+bands of 4; phrases that share any band land in the same bucket, so checking
+a phrase looks at a handful of bucket-mates instead of every phrase in the
+library. Candidates are confirmed with the exact Jaccard similarity of their
+shingle sets (default threshold 0.5, which the banding is tuned for).
+"""
+
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from .library import LibraryFollower
+from .scan import normalize
+
+SHINGLE = 5
+NUM_PERM = 64
+BANDS, ROWS = 16, 4
+DEFAULT_THRESHOLD = 0.5
+MIN_CHARS = 12  # shorter phrases ("Radio 4") are too generic to flag
+MAX_REPORT_BUCKET = 256  # report() skips bigger buckets; their members still meet in other bands
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 2**31, NUM_PERM, dtype=np.uint64)  # a * x stays below 2**63
+_B = _rng.integers(0, 2**32, NUM_PERM, dtype=np.uint64)
+_MAX_ROWS = 200_000  # shingles hashed per numpy chunk
+
+_SENTENCES = re.compile(r"[^.!?\n]+[.!?]*")
+
+# field key -> how to split it into phrases
+PHRASE_FIELDS = {
+    "signature_phrases": "lines",
+    "taglines": "lines",
+    "local_references": "sentences",
+    **{f"opinion_{i}": "whole" for i in range(1, 8)},
+}
+
+
+@dataclass(frozen=True)
+class Phrase:
+    owner: object  # persona id, or None for an unsaved draft
+    name: str      # the owner's char_name, for display
+    field: str
+    text: str      # as written
+
+
+@dataclass(frozen=True)
+class Collision:
+    phrase: Phrase
+    others: tuple     # phrases from other personas sharing one matching text
+    similarity: float
+
+
+def split_phrases(key, value):
+    how = PHRASE_FIELDS[key]
+    if how == "whole":
+        parts = [value]
+    elif how == "lines":
+        parts = value.split("\n")
+    else:
+        parts = _SENTENCES.findall(value)
+    return [part.strip() for part in parts if len(normalize(part)) >= MIN_CHARS]
+
+
+def persona_phrases(owner, bible):
+    return [Phrase(owner, bible.char_name, key, text)
+            for key in PHRASE_FIELDS for text in split_phrases(key, getattr(bible, key))]
+
+
+def shingles(text):
+    text = normalize(text)
+    if len(text) <= SHINGLE:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + SHINGLE].encode("utf-8")) for i in range(len(text) - SHINGLE + 1)}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def signatures(shingle_sets):
+    """(len(shingle_sets), NUM_PERM) MinHash signatures, hashed in vectorised chunks."""
+    out = np.empty((len(shingle_sets), NUM_PERM), dtype=np.uint64)
+    start = 0
+    while start < len(shingle_sets):
+        stop, rows = start, 0
+        while stop < len(shingle_sets) and (rows < _MAX_ROWS or stop == start):
+            rows += len(shingle_sets[stop])
+            stop += 1
+        chunk = shingle_sets[start:stop]
+        values = np.fromiter((h for s in chunk for h in s), dtype=np.uint64, count=rows)
+        offsets = np.cumsum([0] + [len(s) for s in chunk[:-1]])
+        hashed = (values[:, None] * _A + _B) % _PRIME
+        out[start:stop] = np.minimum.reduceat(hashed, offsets, axis=0)
+        start = stop
+    return out
+
+
+def band_keys(signature):
+    return [hash(signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+
+class PhraseIndex:
+    """LSH index over every library persona's phrases. Thread-safe; shared by sessions.
+
+    Buckets hold distinct normalized texts, not phrases, so a line that many
+    personas share verbatim costs one bucket entry however popular it is.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.version = 0  # bumped on every change, for callers that cache results
+        self._texts = {}     # text id -> [Phrase, ...] using that normalized text
+        self._text_ids = {}  # normalized text -> text id
+        self._shingles = {}  # text id -> shingle set, for confirming candidates
+        self._by_owner = {}  # owner -> [Phrase]
+        self._buckets = [{} for _ in range(BANDS)]  # band -> {band hash: [text id]}
+        self._next_id = 0
+        self._follower = LibraryFollower(self.add_persona, self.remove_persona)
+        self._report = (None, [])  # (version, groups)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(phrases) for phrases in self._by_owner.values())
+
+    def add_persona(self, owner, bible):
+        """Index (or re-index) one persona's phrases."""
+        phrases = persona_phrases(owner, bible)
+        with self._lock:
+            self._remove(owner)
+            new = {}
+            for phrase in phrases:
+                text = normalize(phrase.text)
+                text_id = self._text_ids.get(text)
+                if text_id is None:
+                    text_id = self._text_ids[text] = self._next_id
+                    self._next_id += 1
+                    self._texts[text_id] = []
+                    new[text_id] = shingles(text)
+                self._texts[text_id].append(phrase)
+            if new:
+                for text_id, sig in zip(new, signatures(list(new.values()))):
+                    self._shingles[text_id] = new[text_id]
+                    for band, key in enumerate(band_keys(sig)):
+                        self._buckets[band].setdefault(key, []).append(text_id)
+            if phrases:
+                self._by_owner[owner] = phrases
+            self.version += 1
+
+    def remove_persona(self, owner):
+        with self._lock:
+            self._remove(owner)
+            self.version += 1
+
+    def _remove(self, owner):
+        emptied = {}
+        for phrase in self._by_owner.pop(owner, ()):
+            text = normalize(phrase.text)
+            text_id = self._text_ids[text]
+            remaining = [p for p in self._texts[text_id] if p.owner != owner]
+            if remaining:
+                self._texts[text_id] = remaining
+            else:
+                emptied[text_id] = text
+        if not emptied:
+            return
+        for text_id, text in emptied.items():
+            del self._texts[text_id], self._text_ids[text]
+        for text_id, sig in zip(emptied, signatures([self._shingles[i] for i in emptied])):
+            del self._shingles[text_id]
+            for band, key in enumerate(band_keys(sig)):
+                bucket = [i for i in self._buckets[band].get(key, ()) if i != text_id]
+                if bucket:
+                    self._buckets[band][key] = bucket
+                else:
+                    self._buckets[band].pop(key, None)
+
+    def sync(self, library):
+        """Pick up personas saved, changed or deleted elsewhere (other sessions, ingest)."""
+        self._follower.poll(library)
+
+    def follow(self, library, interval=5.0):
+        """Sync from a daemon thread every `interval` seconds, recomputing report() after changes.
+
+        The first pass indexes the whole library; nobody waits for it.
+        """
+        def refresh():
+            if self._report[0] != self.version:
+                self.report()
+
+        self._follower.follow(library, interval, refresh, name="charbible-phrases")
+
+    def latest_report(self):
+        """(groups, current): the last report() without recomputing it. groups is None before the first."""
+        version, groups = self._report
+        if version is None:
+            return None, False
+        return groups, version == self.version
+
+    def _candidates(self, sig):
+        ids = set()
+        for band, key in enumerate(band_keys(sig)):
+            ids.update(self._buckets[band].get(key, ()))
+        return ids
+
+    def _matches(self, phrases, exclude):
+        """Confirmed collisions of `phrases` with indexed phrases not owned by `exclude`."""
+        if not phrases:
+            return []
+        sets = [shingles(p.text) for p in phrases]
+        found = []
+        with self._lock:
+            for phrase, shingle_set, sig in zip(phrases, sets, signatures(sets)):
+                for text_id in self._candidates(sig):
+                    others = tuple(p for p in self._texts[text_id] if p.owner != exclude)
+                    if not others:
+                        continue
+                    similarity = jaccard(shingle_set, self._shingles[text_id])
+                    if similarity >= self.threshold:
+                        found.append(Collision(phrase, others, round(similarity, 3)))
+        found.sort(key=lambda c: (-c.similarity, -len(c.others)))
+        return found
+
+    def check(self, bible, owner=None):
+        """Collisions between a persona's phrases and every other persona's."""
+        return self._matches(persona_phrases(owner, bible), owner)
+
+    def check_field(self, key, value, owner=None, name=""):
+        """Collisions for one field's phrases, as it is being edited."""
+        if key not in PHRASE_FIELDS:
+            return []
+        return self._matches([Phrase(owner, name, key, text) for text in split_phrases(key, value)], owner)
+
+    def report(self):
+        """Groups of near-duplicate phrases used by more than one persona.
+
+        Texts are compared only with texts sharing an LSH bucket, then
+        confirmed pairs are merged into groups (union-find). Groups come back
+        as tuples of Phrase, those spanning the most personas first. The
+        result is kept until the index next changes.
+        """
+        version, groups = self._report
+        if version == self.version:
+            return groups
+        with self._lock:
+            version = self.version
+            texts = {text_id: list(phrases) for text_id, phrases in self._texts.items()}
+            shingle_sets = dict(self._shingles)
+            buckets = [list(ids) for band in self._buckets for ids in band.values()
+                       if 1 < len(ids) <= MAX_REPORT_BUCKET]
+        parent = {}
+
+        def root(text_id):
+            while parent.get(text_id, text_id) != text_id:
+                parent[text_id] = parent.get(parent[text_id], parent[text_id])  # path halving
+                text_id = parent[text_id]
+            return text_id
+
+        checked = set()
+        for ids in buckets:
+            for n, first in enumerate(ids):
+                for second in ids[n + 1:]:
+                    pair = (min(first, second), max(first, second))
+                    if pair in checked or root(first) == root(second):
+                        continue
+                    checked.add(pair)
+                    if jaccard(shingle_sets[first], shingle_sets[second]) >= self.threshold:
+                        parent[root(first)] = root(second)
+        groups = {}
+        for text_id, phrases in texts.items():
+            groups.setdefault(root(text_id), []).extend(phrases)
+        found = [tuple(sorted(phrases, key=lambda p: (p.name, p.field)))
+                 for phrases in groups.values() if len({p.owner for p in phrases}) > 1]
+        found.sort(key=lambda group: (-len({p.owner for p in group}), group[0].text))
+        self._report = (version, found)
+        return found
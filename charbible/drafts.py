@@ -0,0 +1,187 @@
+"""
+Draft persistence: a SQLite draft table and a debounced write-behind queue.
+
+The Streamlit script only ever calls AutosaveQueue.put(), which merges the
+changed fields into an in-memory dict and returns. A daemon thread wakes up
+after the debounce delay and writes everything pending in one transaction.
+The same thread deletes drafts untouched for CHARBIBLE_DRAFT_MAX_DAYS
+(default 30), at most once every PRUNE_INTERVAL seconds.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.environ.get("CHARBIBLE_DB", "charbible.db")
+DRAFT_MAX_AGE = float(os.environ.get("CHARBIBLE_DRAFT_MAX_DAYS", "30")) * 24 * 3600
+PRUNE_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_updated ON drafts (updated_at DESC);
+CREATE TABLE IF NOT EXISTS draft_fields (
+    draft_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (draft_id, key)
+) WITHOUT ROWID;
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class DraftStore:
+    """Drafts keyed by id. Only non-empty fields are stored."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._conn.executescript(SCHEMA)
+
+    def write(self, changes):
+        """Apply {draft_id: {key: value}} in one transaction."""
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                for draft_id, fields in changes.items():
+                    conn.execute(
+                        "INSERT INTO drafts (id, name, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET updated_at = excluded.updated_at",
+                        (draft_id, fields.get("char_name", ""), now))
+                    if "char_name" in fields:
+                        conn.execute("UPDATE drafts SET name = ? WHERE id = ?",
+                                     (fields["char_name"], draft_id))
+                    conn.executemany(
+                        "INSERT INTO draft_fields (draft_id, key, value) VALUES (?, ?, ?) "
+                        "ON CONFLICT (draft_id, key) DO UPDATE SET value = excluded.value",
+                        [(draft_id, k, v) for k, v in fields.items() if v])
+                    conn.executemany(
+                        "DELETE FROM draft_fields WHERE draft_id = ? AND key = ?",
+                        [(draft_id, k) for k, v in fields.items() if not v])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def list_drafts(self, limit=20):
+        """[(draft_id, name, updated_at)], most recent first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, name, updated_at FROM drafts ORDER BY updated_at DESC LIMIT ?",
+                (limit,)).fetchall()
+
+    def load(self, draft_id):
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT key, value FROM draft_fields WHERE draft_id = ?", (draft_id,)))
+
+    def delete(self, draft_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM draft_fields WHERE draft_id = ?", (draft_id,))
+            self._conn.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
+
+    def prune(self, max_age=DRAFT_MAX_AGE):
+        """Delete drafts untouched for longer than `max_age` seconds. Returns how many."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM draft_fields WHERE draft_id IN "
+                             "(SELECT id FROM drafts WHERE updated_at < ?)", (cutoff,))
+                count = conn.execute("DELETE FROM drafts WHERE updated_at < ?", (cutoff,)).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return count
+
+
+class AutosaveQueue:
+    """Debounced write-behind queue in front of a DraftStore.
+
+    put() is O(changed fields) and never touches disk. Changes to the same
+    field within one debounce window collapse to the last value.
+    """
+
+    def __init__(self, drafts, delay=1.0, max_age=DRAFT_MAX_AGE):
+        self.drafts = drafts
+        self.delay = delay
+        self.max_age = max_age
+        self.flushes = 0
+        self.pruned = 0
+        self._pruned_at = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="charbible-autosave", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, draft_id, changes):
+        if not changes:
+            return
+        with self._lock:
+            self._pending.setdefault(draft_id, {}).update(changes)
+        self._wake.set()
+
+    def flush(self):
+        """Write everything pending now, on the calling thread."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.drafts.write(pending)
+        except Exception:
+            # Put the batch back underneath anything that arrived meanwhile
+            with self._lock:
+                for draft_id, fields in pending.items():
+                    fields.update(self._pending.get(draft_id, {}))
+                    self._pending[draft_id] = fields
+            raise
+        self.flushes += 1
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._wake.set()
+            self._thread.join(timeout=5)
+            self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait()
+            if not self._closed:
+                time.sleep(self.delay)
+            self._wake.clear()
+            try:
+                self.flush()
+                self._prune()
+            except sqlite3.Error:
+                # Database busy or unwritable: keep the thread alive and
+                # retry after another debounce interval.
+                self._wake.set()
+
+    def _prune(self):
+        """Drop stale drafts, at most once per PRUNE_INTERVAL; runs after a flush."""
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self.pruned += self.drafts.prune(self.max_age)
+        self._pruned_at = now
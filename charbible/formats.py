@@ -0,0 +1,338 @@
+"""
+Export formats built from one intermediate representation.
+
+build_ir() turns a CharacterBible into a PersonaIR once: fields grouped by
+schema section, values stripped, list fields split into items. Every
+registered Format serializes that IR; formats with a loader can be read back
+into field values, and roundtrip_errors() checks that they are lossless.
+
+canonical=True builds the IR from bible.canonical() and leaves the date out,
+so every format depends only on the persona's content: the same persona gives
+the same bytes on any day, however its fields were typed. output_digest() is
+the hash to key prompt caches and dedupe on.
+
+    persona    structured JSON
+    yaml       the same tree as YAML (needs PyYAML)
+    prompt     a compact plain-text system prompt
+    bible      the Full Character Bible markdown (read back by its headings and labels)
+    voice_card the Voice Card markdown
+
+Register more with register(Format(...)).
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from .model import CharacterBible
+from .render import CANONICAL_BIBLE, FULL_BIBLE, render_full_bible, render_voice_card
+from .schema import FIELDS, FIELDS_BY_KEY, GENERATE_SECTION, SECTIONS
+
+FORMAT_VERSION = "charbible/1"
+
+
+@dataclass(frozen=True)
+class PersonaIR:
+    bible: CharacterBible
+    generated: date  # None when canonical
+    sections: tuple  # ((Section, ((Field, value), ...)), ...); list fields have tuple values
+    canonical: bool = False
+
+    @property
+    def name(self):
+        return self.bible.char_name.strip()
+
+    def values(self):
+        """Flat {key: value} as the IR normalised it; loaders must reproduce exactly this."""
+        return {f.key: "\n".join(value) if f.is_list else value
+                for _, fields in self.sections for f, value in fields}
+
+    def tree(self):
+        """Plain dicts and lists, for structured serializers."""
+        return {
+            "format": FORMAT_VERSION,
+            "name": self.name,
+            "sections": [
+                {"title": section.title, "fields": {f.key: list(value) if f.is_list else value
+                                                    for f, value in fields}}
+                for section, fields in self.sections
+            ],
+        }
+
+
+def build_ir(bible, generated=None, canonical=False):
+    if canonical:
+        bible = bible.canonical()
+    sections = []
+    for index, section in enumerate(SECTIONS):
+        if index == GENERATE_SECTION:
+            continue
+        fields = tuple(
+            (f, tuple(bible.lines(f.key)) if f.is_list else getattr(bible, f.key).strip())
+            for f in FIELDS if f.section == index)
+        sections.append((section, fields))
+    if canonical:
+        return PersonaIR(bible, None, tuple(sections), canonical=True)
+    return PersonaIR(bible, generated or date.today(), tuple(sections))
+
+
+@dataclass(frozen=True)
+class Format:
+    name: str
+    filename: str  # pattern with {} for the persona's stem
+    mime: str
+    dump: object   # callable(PersonaIR) -> str
+    load: object = None  # callable(str) -> {key: value}, if the format can be read back
+
+
+FORMATS = {}
+
+
+def register(fmt):
+    FORMATS[fmt.name] = fmt
+    return fmt
+
+
+def export(bible, names, generated=None, canonical=False):
+    """{format name: text} for every name, from a single IR."""
+    ir = build_ir(bible, generated, canonical)
+    return {name: FORMATS[name].dump(ir) for name in names}
+
+
+def output_digest(text):
+    """sha256 hex digest of a rendered output's UTF-8 bytes."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def roundtrip_errors(bible):
+    """[(format, field key)] for every loadable format that doesn't reproduce the IR,
+    plain or canonical ("<format> (canonical)")."""
+    errors = []
+    for ir, suffix in ((build_ir(bible), ""), (build_ir(bible, canonical=True), " (canonical)")):
+        expected = ir.values()
+        for fmt in FORMATS.values():
+            if fmt.load is None:
+                continue
+            loaded = fmt.load(fmt.dump(ir))
+            errors.extend((fmt.name + suffix, key) for key in expected if loaded.get(key, "") != expected[key])
+    return errors
+
+
+def persona_from_record(record, strict=False):
+    """A CharacterBible from one parsed record: plain {field: value} or a persona export.
+
+    Raises ValueError for anything that isn't a usable persona: not an
+    object, spare CSV cells, list or object values, no schema fields, no
+    char_name, or (strict) missing required fields.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    if None in record:  # csv.DictReader's key for cells past the header
+        raise ValueError(f"{len(record[None])} more cell(s) than the header has columns")
+    if str(record.get("format", "")).startswith("charbible/"):
+        record = _values_from_tree(record)
+    nested = sorted(key for key, value in record.items() if isinstance(value, (dict, list)))
+    if nested:
+        raise ValueError(f"expected text, got a list or object for: {', '.join(nested)}")
+    if not any(key in FIELDS_BY_KEY for key in record):
+        raise ValueError("no persona fields (char_name, tone, ...)")
+    bible = CharacterBible.from_mapping(record)
+    if not bible.char_name.strip():
+        raise ValueError("no char_name; is this a persona?")
+    if strict and bible.missing_required():
+        raise ValueError(f"missing required fields: {', '.join(bible.missing_required())}")
+    return bible
+
+
+# ---------------------------------------------------------------------------
+# Structured: JSON and YAML
+# ---------------------------------------------------------------------------
+
+def _values_from_tree(tree):
+    if not isinstance(tree, dict) or tree.get("format") != FORMAT_VERSION:
+        raise ValueError(f"not a {FORMAT_VERSION} document")
+    values = {}
+    for section in tree.get("sections", ()):
+        for key, value in section.get("fields", {}).items():
+            if key not in FIELDS_BY_KEY:
+                raise ValueError(f"unknown field {key!r}")
+            values[key] = "\n".join(value) if isinstance(value, list) else str(value)
+    return values
+
+
+def _dump_json(ir):
+    return json.dumps(ir.tree(), indent=2, ensure_ascii=False) + "\n"
+
+
+def _load_json(text):
+    return _values_from_tree(json.loads(text))
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError as e:
+        raise RuntimeError("the yaml format needs PyYAML: pip install pyyaml") from e
+    return yaml
+
+
+_yaml_dumper = None
+
+
+def _represent_str(dumper, value):
+    style = "|" if "\n" in value else None
+    return dumper.represent_scalar("tag:yaml.org,2002:str", value, style=style)
+
+
+def _dumper():
+    """SafeDumper (libyaml's when available) that writes multi-line values as | blocks."""
+    global _yaml_dumper
+    if _yaml_dumper is None:
+        yaml = _yaml()
+
+        class Dumper(getattr(yaml, "CSafeDumper", yaml.SafeDumper)):
+            pass
+
+        Dumper.add_representer(str, _represent_str)
+        _yaml_dumper = Dumper
+    return _yaml_dumper
+
+
+def _dump_yaml(ir):
+    return _yaml().dump(ir.tree(), Dumper=_dumper(), sort_keys=False, allow_unicode=True, width=100)
+
+
+def _load_yaml(text):
+    yaml = _yaml()
+    return _values_from_tree(yaml.load(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)))
+
+
+# ---------------------------------------------------------------------------
+# System prompt
+# ---------------------------------------------------------------------------
+#
+#     You are Nigel Thistledown, Eccentric English Horticulturalist. ...
+#
+#     ## Identity Core
+#     Character Name: Nigel Thistledown
+#     Origin Story:
+#       first line
+#       second line
+#     Signature Phrases:
+#     - A garden without cheek is just a lawn.
+#
+# Empty fields and sections are left out. Continuation lines are indented two
+# spaces, so a value can never be mistaken for a label.
+
+_LABELS = {f.label: f for f in FIELDS}
+
+
+def _dump_prompt(ir):
+    role = ir.bible.char_role.strip()
+    who = ", ".join(part for part in (ir.name or "this character", role) if part)
+    out = [f"You are {who}. Stay in character at all times; everything below is who you are.\n"]
+    for section, fields in ir.sections:
+        lines = []
+        for f, value in fields:
+            if not value:
+                continue
+            if f.is_list:
+                lines.append(f"{f.label}:")
+                lines.extend(f"- {item}" for item in value)
+            elif "\n" in value:
+                lines.append(f"{f.label}:")
+                lines.extend(f"  {line}" for line in value.split("\n"))
+            else:
+                lines.append(f"{f.label}: {value}")
+        if lines:
+            out.append(f"\n## {section.title}\n")
+            out.extend(line + "\n" for line in lines)
+    return "".join(out)
+
+
+def _load_prompt(text):
+    values = {}
+    current = None
+    for line in text.split("\n"):
+        if current is not None and line.startswith("  "):
+            values[current.key] += ("\n" if values[current.key] else "") + line[2:]
+        elif current is not None and current.is_list and line.startswith("- "):
+            values[current.key] += ("\n" if values[current.key] else "") + line[2:]
+        elif ":" in line and line.split(":", 1)[0] in _LABELS:
+            label, value = line.split(":", 1)
+            current = _LABELS[label]
+            values[current.key] = value[1:] if value.startswith(" ") else value
+        else:
+            current = None  # header, section heading or blank line
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Full Character Bible, read back
+# ---------------------------------------------------------------------------
+#
+# The bible template's literal text is the set of anchors: a field's value is
+# whatever lies between the literal before it and the literal after it.
+# Whitespace inside an anchor is matched loosely, since editors strip the
+# trailing spaces after **Name:** and rewrite line endings, but a line break in
+# the template must still be a line break, so "version 2.0" can't pass for the
+# "\n2. " before opinion 2.
+
+def _anchor(literal):
+    parts = []
+    for chunk in re.split(r"(\s+)", literal):
+        if not chunk:
+            continue
+        if not chunk.isspace():
+            parts.append(re.escape(chunk))
+        elif "\n" not in chunk:
+            parts.append(r"[ \t]*")
+        elif parts:
+            parts.append(r"\s*\n\s*")
+        else:
+            # Leading break: only require a line start, since the previous
+            # anchor may already have consumed the newline (empty value)
+            parts.append(r"\s*(?<![^\n])[ \t]*")
+    return re.compile("".join(parts))
+
+
+_BIBLE_ANCHORS = tuple((_anchor(literal), literal, name) for literal, name in FULL_BIBLE.parts)
+_CANONICAL_ANCHORS = tuple((_anchor(literal), literal, name) for literal, name in CANONICAL_BIBLE.parts)
+_DATE_LINE = re.compile(r"[^\n]*\n\s*\*Generated ")  # the title line, then the date
+
+
+def _load_bible(text):
+    text = text.lstrip("\ufeff").replace("\r\n", "\n")
+    pos = len(text) - len(text.lstrip())
+    anchors = _BIBLE_ANCHORS if _DATE_LINE.match(text, pos) else _CANONICAL_ANCHORS
+    raw = {}
+    previous = None
+    for index, (anchor, literal, name) in enumerate(anchors):
+        match = anchor.match(text, pos) if index == 0 else anchor.search(text, pos)
+        if match is None:
+            if name is None:  # footer missing or reworded: the last field runs to the end
+                raw[previous] = text[pos:]
+                break
+            label = [line for line in literal.split("\n") if line.strip()][-1].strip()
+            raise ValueError(f"line {text.count(chr(10), 0, pos) + 1}: expected {label!r} "
+                             f"before {name!r}; not a Full Character Bible?")
+        if previous is not None:
+            raw[previous] = text[pos:match.start()]
+        pos = match.end()
+        previous = name
+    values = {}
+    for f in FIELDS:
+        value = raw.get(f.key, "").strip()
+        values[f.key] = "\n".join(line.strip() for line in value.split("\n") if line.strip()) \
+            if f.is_list else value
+    return values
+
+
+register(Format("persona", "persona_{}.json", "application/json", _dump_json, _load_json))
+register(Format("yaml", "persona_{}.yaml", "application/yaml", _dump_yaml, _load_yaml))
+register(Format("prompt", "prompt_{}.txt", "text/plain", _dump_prompt, _load_prompt))
+register(Format("bible", "bible_{}.md", "text/markdown",
+                lambda ir: render_full_bible(ir.bible, ir.generated, ir.canonical), _load_bible))
+register(Format("voice_card", "voicecard_{}.md", "text/markdown", lambda ir: render_voice_card(ir.bible)))
@@ -0,0 +1,182 @@
+"""
+Version history for library personas, and per-field diffs.
+
+Every library save that changes something records a version. A version
+stores only the fields that changed since the previous one (delta rows),
+and field values live in a content-addressed blob table, so a value shared
+by many versions or personas is stored once. Version N is rebuilt by
+replaying deltas 1..N.
+
+field_diff() compares one field line by line, then sentence by sentence and
+word by word inside changed lines, with difflib.
+"""
+
+import difflib
+import hashlib
+import re
+import time
+
+from .schema import FIELD_KEYS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash BLOB PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    persona_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    UNIQUE (persona_id, number)
+);
+CREATE TABLE IF NOT EXISTS version_fields (
+    version_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    hash BLOB NOT NULL,
+    PRIMARY KEY (version_id, key)
+) WITHOUT ROWID;
+"""
+
+
+def _blob(conn, value):
+    digest = hashlib.sha256(value.encode("utf-8", "surrogatepass")).digest()
+    conn.execute("INSERT OR IGNORE INTO blobs (hash, value) VALUES (?, ?)", (digest, value))
+    return digest
+
+
+def record_version(conn, persona_id, previous, values, name):
+    """Record a version of `values` (a {key: value} dict) inside the caller's transaction.
+
+    `previous` is what the library held before this save, or None for a new
+    persona. Returns the new version number, or None if nothing changed.
+    """
+    last = conn.execute("SELECT max(number) FROM versions WHERE persona_id = ?", (persona_id,)).fetchone()[0]
+    if last is None and previous is not None and any(previous.values()):
+        # Saved before history existed: start from what was there
+        last = _insert_version(conn, persona_id, 0, previous.get("char_name", ""), previous,
+                               {key: "" for key in FIELD_KEYS})
+    base = previous or {key: "" for key in FIELD_KEYS}
+    if last is not None and all(values[key] == base.get(key, "") for key in FIELD_KEYS):
+        return None
+    return _insert_version(conn, persona_id, last or 0, name, values, base)
+
+
+def _insert_version(conn, persona_id, last, name, values, base):
+    number = last + 1
+    version_id = conn.execute(
+        "INSERT INTO versions (persona_id, number, name, created_at) VALUES (?, ?, ?, ?)",
+        (persona_id, number, name, time.time())).lastrowid
+    conn.executemany(
+        "INSERT INTO version_fields (version_id, key, hash) VALUES (?, ?, ?)",
+        [(version_id, key, _blob(conn, values[key]))
+         for key in FIELD_KEYS if values[key] != base.get(key, "")])
+    return number
+
+
+def list_versions(conn, persona_id=None, limit=200):
+    """[(persona_id, number, name, created_at, fields changed)], newest first."""
+    where, params = ("WHERE v.persona_id = ?", (persona_id,)) if persona_id is not None else ("", ())
+    return conn.execute(
+        f"SELECT v.persona_id, v.number, v.name, v.created_at, count(f.key) FROM versions v "
+        f"LEFT JOIN version_fields f ON f.version_id = v.id {where} "
+        f"GROUP BY v.id ORDER BY v.created_at DESC, v.number DESC LIMIT ?",
+        (*params, limit)).fetchall()
+
+
+def load_version(conn, persona_id, number):
+    """{key: value} of one version, rebuilt from its deltas."""
+    values = dict.fromkeys(FIELD_KEYS, "")
+    rows = conn.execute(
+        "SELECT f.key, b.value FROM versions v "
+        "JOIN version_fields f ON f.version_id = v.id JOIN blobs b ON b.hash = f.hash "
+        "WHERE v.persona_id = ? AND v.number <= ? ORDER BY v.number",
+        (persona_id, number)).fetchall()
+    if not rows and not conn.execute(
+            "SELECT 1 FROM versions WHERE persona_id = ? AND number = ?", (persona_id, number)).fetchone():
+        raise KeyError((persona_id, number))
+    for key, value in rows:
+        values[key] = value
+    return values
+
+
+def delete_history(conn, persona_id):
+    conn.execute("DELETE FROM version_fields WHERE version_id IN "
+                 "(SELECT id FROM versions WHERE persona_id = ?)", (persona_id,))
+    conn.execute("DELETE FROM versions WHERE persona_id = ?", (persona_id,))
+    conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM version_fields)")
+
+
+# ---------------------------------------------------------------------------
+# Diff
+# ---------------------------------------------------------------------------
+
+def _split_lines(text):
+    return text.splitlines(keepends=True)
+
+
+_SENTENCE = re.compile(r"[^.!?]*[.!?]+\s*|[^.!?]+$")
+_WORD = re.compile(r"\s+|\w+|[^\w\s]")
+
+# Each level splits one unit of the level above; the concatenated units are
+# always the original text.
+LEVELS = (_split_lines, _SENTENCE.findall, _WORD.findall)
+MAX_UNITS = 2000           # a unit with more pieces than this is shown replaced whole
+MIN_RATIO = 0.5            # below this similarity a unit is shown replaced, not refined
+
+
+def _diff(a, b, level, ops):
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    if level and matcher.ratio() < MIN_RATIO:  # rewritten rather than edited
+        ops.append(("delete", "".join(a)))
+        ops.append(("insert", "".join(b)))
+        return
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(("equal", "".join(a[i1:i2])))
+        elif tag == "replace" and i2 - i1 == j2 - j1 and level + 1 < len(LEVELS):
+            for old, new in zip(a[i1:i2], b[j1:j2]):
+                old_units, new_units = LEVELS[level + 1](old), LEVELS[level + 1](new)
+                if len(old_units) + len(new_units) > MAX_UNITS:
+                    ops.append(("delete", old))
+                    ops.append(("insert", new))
+                else:
+                    _diff(old_units, new_units, level + 1, ops)
+        else:
+            if i1 < i2:
+                ops.append(("delete", "".join(a[i1:i2])))
+            if j1 < j2:
+                ops.append(("insert", "".join(b[j1:j2])))
+
+
+def field_diff(old, new):
+    """[(tag, text)] with tag in equal/delete/insert; None if the values are equal.
+
+    Lines are matched first, then sentences inside a changed line, then words
+    inside a changed sentence, so a one-word edit in a long paragraph stays
+    small and every SequenceMatcher sees a short sequence.
+    """
+    if old == new:
+        return None
+    ops = []
+    _diff(LEVELS[0](old), LEVELS[0](new), 0, ops)
+    merged = []
+    for tag, text in ops:
+        if not text:
+            continue
+        if merged and merged[-1][0] == tag:
+            merged[-1] = (tag, merged[-1][1] + text)
+        else:
+            merged.append((tag, text))
+    return merged
+
+
+def bible_diff(old, new):
+    """[(key, ops)] for every field that differs between two {key: value} mappings."""
+    out = []
+    for key in FIELD_KEYS:
+        ops = field_diff(old.get(key, ""), new.get(key, ""))
+        if ops:
+            out.append((key, ops))
+    return out
@@ -0,0 +1,257 @@
+"""
+Saved persona library with SQLite FTS5 full-text search.
+
+Each persona is one row of an FTS5 table with a column per schema field, so
+searches can be ranked across the whole bible or restricted to one field
+(``never_do:slang``). Saving a persona rewrites only that persona's row, so
+the index is maintained incrementally. Each save that changes something is
+also recorded as a version (see history.py).
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from . import history
+from .drafts import DEFAULT_DB_PATH, connect
+from .model import CharacterBible
+from .schema import FIELD_KEYS
+
+_COLUMNS = ", ".join(FIELD_KEYS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS personas (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS personas_updated ON personas (updated_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS personas_fts USING fts5(
+    {_COLUMNS},
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+_TOKEN = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+_WORD = re.compile(r"\w+")
+
+
+def build_match(query):
+    """Translate a search box query into an FTS5 MATCH expression.
+
+    Supports bare words, "quoted phrases", trailing * for prefixes and
+    field:term filters on any schema field. Everything else is treated as
+    plain text, so user input can never produce an FTS5 syntax error.
+    """
+    clauses = []
+    for column, phrase, word in _TOKEN.findall(query):
+        text = phrase if phrase else word
+        words = _WORD.findall(text)
+        if not words:
+            continue
+        prefix = bool(word) and word.endswith("*")
+        clause = '"' + " ".join(words) + '"' + ("*" if prefix else "")
+        if column in FIELD_KEYS:
+            clause = f"{column} : {clause}"
+        elif column:
+            # Not a field name: search for it as an ordinary word
+            clause = f'"{column}" {clause}'
+        clauses.append(clause)
+    return " AND ".join(clauses)
+
+
+@dataclass
+class SearchHit:
+    persona_id: int
+    name: str
+    score: float
+    field: str
+    snippet: str
+
+
+class Library:
+    """Saved personas. Safe to share between sessions and threads."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._conn.executescript(SCHEMA)
+        self._conn.executescript(history.SCHEMA)
+
+    def save(self, bible, persona_id=None):
+        """Insert or update one persona, its index row and its history. Returns its id."""
+        return self.save_many([bible], [persona_id])[0]
+
+    def save_many(self, bibles, persona_ids=None):
+        """save() for many personas in one transaction. Returns their ids, in order."""
+        persona_ids = persona_ids or [None] * len(bibles)
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                ids = [self._save(conn, bible, persona_id) for bible, persona_id in zip(bibles, persona_ids)]
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    @staticmethod
+    def _save(conn, bible, persona_id):
+        values = bible.values()
+        previous = None
+        if persona_id is None:
+            persona_id = conn.execute(
+                "INSERT INTO personas (name, updated_at) VALUES (?, ?)",
+                (bible.char_name, time.time())).lastrowid
+        else:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM personas_fts WHERE rowid = ?", (persona_id,)).fetchone()
+            previous = dict(zip(FIELD_KEYS, row)) if row else None
+            conn.execute(
+                "INSERT INTO personas (id, name, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, updated_at = excluded.updated_at",
+                (persona_id, bible.char_name, time.time()))
+            conn.execute("DELETE FROM personas_fts WHERE rowid = ?", (persona_id,))
+        conn.execute(
+            f"INSERT INTO personas_fts (rowid, {_COLUMNS}) VALUES (?{', ?' * len(values)})",
+            (persona_id, *values))
+        history.record_version(conn, persona_id, previous, dict(zip(FIELD_KEYS, values)), bible.char_name)
+        return persona_id
+
+    def get(self, persona_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM personas_fts WHERE rowid = ?", (persona_id,)).fetchone()
+        if row is None:
+            raise KeyError(persona_id)
+        return CharacterBible(**dict(zip(FIELD_KEYS, row)))
+
+    def list(self, limit=50):
+        """[(persona_id, name, updated_at)], most recently saved first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, name, updated_at FROM personas ORDER BY updated_at DESC LIMIT ?",
+                (limit,)).fetchall()
+
+    def content_hashes(self):
+        """{CharacterBible.content_hash(): persona id} for every saved persona."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT rowid, {_COLUMNS} FROM personas_fts").fetchall()
+        return {CharacterBible(**dict(zip(FIELD_KEYS, row[1:]))).content_hash(): row[0] for row in rows}
+
+    def ids(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM personas ORDER BY id")]
+
+    def delete(self, persona_id):
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM personas_fts WHERE rowid = ?", (persona_id,))
+                conn.execute("DELETE FROM personas WHERE id = ?", (persona_id,))
+                history.delete_history(conn, persona_id)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def versions(self, persona_id=None, limit=200):
+        """[(persona_id, number, name, created_at, fields changed)], newest first."""
+        with self._lock:
+            return history.list_versions(self._conn, persona_id, limit)
+
+    def version(self, persona_id, number):
+        with self._lock:
+            return CharacterBible(**history.load_version(self._conn, persona_id, number))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM personas").fetchone()[0]
+
+    def search(self, query, limit=20):
+        """Ranked (BM25) hits with a highlighted snippet from the best field."""
+        expression = build_match(query)
+        if not expression:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT rowid, char_name, bm25(personas_fts), "
+                f"snippet(personas_fts, -1, '**', '**', '…', 12), {_COLUMNS} "
+                f"FROM personas_fts WHERE personas_fts MATCH ? ORDER BY rank LIMIT ?",
+                (expression, limit)).fetchall()
+        return [SearchHit(row[0], row[1], -row[2], _snippet_field(row[3], row[4:]), row[3])
+                for row in rows]
+
+
+class LibraryFollower:
+    """Keeps a derived in-memory index in step with the library.
+
+    poll() lists the library at most every `max_age` seconds and calls
+    `add(persona_id, bible)` for personas saved since the last poll (by any
+    session or process) and `remove(persona_id)` for deleted ones. follow()
+    does that from a daemon thread instead, so no script run waits on it.
+    """
+
+    def __init__(self, add, remove, max_age=5.0):
+        self.add = add
+        self.remove = remove
+        self.max_age = max_age
+        self.synced = False  # True once a poll has seen the whole library
+        self._seen = {}  # persona id -> updated_at
+        self._polled_at = None
+        self._lock = threading.Lock()
+
+    def poll(self, library):
+        """Apply the library's changes since the last poll. Returns True if there were any."""
+        with self._lock:
+            now = time.monotonic()
+            if self._polled_at is not None and now - self._polled_at < self.max_age:
+                return False
+            self._polled_at = now
+            current = {persona_id: updated for persona_id, _, updated in library.list(limit=-1)}
+            changed = False
+            for persona_id in set(self._seen) - set(current):
+                self.remove(persona_id)
+                self._seen.pop(persona_id, None)
+                changed = True
+            for persona_id, updated in current.items():
+                if self._seen.get(persona_id) != updated:
+                    try:
+                        self.add(persona_id, library.get(persona_id))
+                    except KeyError:  # deleted since list()
+                        continue
+                    self._seen[persona_id] = updated
+                    changed = True
+            self.synced = True
+            return changed
+
+    def follow(self, library, interval=5.0, after=None, name="charbible-follow"):
+        """poll() every `interval` seconds on a daemon thread, calling `after()` following each poll."""
+        self.max_age = min(self.max_age, interval)
+
+        def run():
+            while True:
+                try:
+                    self.poll(library)
+                    if after is not None:
+                        after()
+                except sqlite3.Error:
+                    pass  # database busy: try again next interval
+                time.sleep(interval)
+
+        threading.Thread(target=run, name=name, daemon=True).start()
+
+
+def _snippet_field(snippet, values):
+    """The field FTS5 took the snippet from: the one containing its plain text."""
+    text = snippet.replace("**", "").strip("…")
+    for key, value in zip(FIELD_KEYS, values):
+        if text in value:
+            return key
+    return ""
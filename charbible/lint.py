@@ -0,0 +1,128 @@
+"""
+Cross-field consistency lint for a persona being edited.
+
+Each rule declares the fields it reads. A Linter re-runs only the rules that
+touch fields changed since its last refresh (it is a "lint" consumer of the
+FieldStore's dirty sets), and rule results are cached process-wide by the
+hash of the rule's field values, so undoing an edit or loading a persona
+someone else already linted costs a lookup.
+"""
+
+import hashlib
+from dataclasses import dataclass
+
+from .cache import LRUCache
+from .model import CharacterBible
+from .scan import AhoCorasick, markers, normalize, violation_patterns
+
+# Free-text fields where the persona's own words appear
+VOICE_FIELDS = ("signature_phrases", "verbal_tics", "how_they_start", "how_they_end",
+                "how_they_curse", "how_they_compliment", "taglines", "podcast_title")
+
+LINT_CACHE = LRUCache(maxsize=2048)
+GUARDRAIL_CACHE = LRUCache(maxsize=64)  # (never_do, reference_never) -> matcher
+
+
+@dataclass(frozen=True)
+class Issue:
+    rule: str
+    field: str  # where to show it
+    message: str
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    fields: tuple
+    check: object  # callable(values dict) -> iterable of Issue
+
+
+def _guardrail_matcher(never_do, reference_never):
+    """(banned patterns, AhoCorasick over them), shared by every field's guardrail rule."""
+    def build():
+        bible = CharacterBible(never_do=never_do, reference_never=reference_never)
+        banned = [p for p in violation_patterns(bible) if p.text]
+        return banned, AhoCorasick(f" {p.text} " for p in banned) if banned else None
+    return GUARDRAIL_CACHE.get_or_create((never_do, reference_never), build)
+
+
+def _breaks_guardrails(key):
+    def check(values):
+        banned, matcher = _guardrail_matcher(values["never_do"], values["reference_never"])
+        if not banned:
+            return
+        bible = CharacterBible.from_mapping(values)
+        for n, line in enumerate(bible.lines(key), 1):
+            for _, index in matcher.finditer(f" {normalize(line)} "):
+                pattern = banned[index]
+                where = "Never references" if pattern.source == "reference_never" else "Never do"
+                yield Issue(f"guardrail:{key}", key,
+                            f'Line {n} says "{pattern.text}", which clashes with {where}: "{pattern.rule}"')
+    return Rule(f"guardrail:{key}", (key, "never_do", "reference_never"), check)
+
+
+def _reference_conflict(key):
+    def check(values):
+        never = f" {normalize(values['reference_never'])} "
+        allowed = f" {normalize(values[key])} "
+        clashes = [term for term in markers(values[key]) if f" {term} " in never]
+        clashes += [term for term in markers(values["reference_never"])
+                    if f" {term} " in allowed and term not in clashes]
+        for term in clashes:
+            yield Issue(f"reference:{key}", key, f'"{term}" is also listed under Never References')
+    return Rule(f"reference:{key}", (key, "reference_never"), check)
+
+
+def _duplicate_opinions(values):
+    seen = {}
+    for i in range(1, 8):
+        key = f"opinion_{i}"
+        text = normalize(values[key])
+        if not text:
+            continue
+        if text in seen:
+            yield Issue("duplicate-opinion", key, f"Same as opinion {seen[text]}")
+        else:
+            seen[text] = i
+
+
+RULES = (
+    *(_breaks_guardrails(key) for key in VOICE_FIELDS),
+    _reference_conflict("reference_primary"),
+    _reference_conflict("reference_secondary"),
+    Rule("duplicate-opinion", tuple(f"opinion_{i}" for i in range(1, 8)), _duplicate_opinions),
+)
+
+
+class Linter:
+    """Per-session lint state over a FieldStore."""
+
+    def __init__(self, rules=RULES, cache=LINT_CACHE):
+        self.rules = rules
+        self.cache = cache
+        self.by_field = {}
+        for rule in rules:
+            for key in rule.fields:
+                self.by_field.setdefault(key, []).append(rule)
+        self.results = {}  # rule name -> tuple of Issue
+        self._issues_by_field = {}
+
+    def refresh(self, store):
+        """Re-run rules touching fields changed since the last refresh. Returns how many ran."""
+        rules = {rule.name: rule for key in store.take_dirty("lint") for rule in self.by_field.get(key, ())}
+        for rule in rules.values():
+            values = {key: store[key] for key in rule.fields}
+            digest = hashlib.sha256("\0".join(values.values()).encode("utf-8", "surrogatepass")).digest()
+            self.results[rule.name] = self.cache.get_or_create(
+                (rule.name, digest), lambda: tuple(rule.check(values)))
+        if rules:
+            self._issues_by_field = {}
+            for issues in self.results.values():
+                for issue in issues:
+                    self._issues_by_field.setdefault(issue.field, []).append(issue)
+        return len(rules)
+
+    def issues(self, key=None):
+        if key is not None:
+            return self._issues_by_field.get(key, [])
+        return [issue for issues in self._issues_by_field.values() for issue in issues]
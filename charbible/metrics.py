@@ -0,0 +1,234 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+A tiny, dependency-free registry of histograms and counters. Exporters are
+opt-in through the environment:
+
+    CHARBIBLE_METRICS_PORT=9464      serve /metrics over HTTP
+    CHARBIBLE_METRICS_FILE=path.prom rewrite a textfile every few seconds
+
+Latency budgets (in milliseconds) are checked on every observation; misses
+are counted in charbible_budget_exceeded_total so they can be alerted on.
+"""
+
+import bisect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Per-observation budgets in milliseconds, keyed by metric name
+LATENCY_BUDGETS_MS = {
+    "charbible_rerun_seconds": 250,
+    "charbible_section_seconds": 100,
+    "charbible_render_seconds": 50,
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def quantile(self, q, **labels):
+        """Approximate quantile (bucket upper bound) for one label set."""
+        series = self.snapshot().get(_label_key(labels))
+        if not series:
+            return None
+        counts = series[:-1]
+        target = q * sum(counts)
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            if running >= target:
+                return bound
+        return float("inf")
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                running += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', le)])} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {running}")
+        return lines
+
+
+class Counter:
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(key)} {value}" for key, value in items)
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self.budget_exceeded = self.counter(
+            "charbible_budget_exceeded_total", "Observations over their latency budget")
+
+    def _get(self, cls, name, *args):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args)
+            return metric
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, buckets)
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def observe(self, name, value, **labels):
+        self.metrics[name].observe(value, **labels)
+        budget = LATENCY_BUDGETS_MS.get(name)
+        if budget is not None and value * 1000 > budget:
+            self.budget_exceeded.inc(metric=name, **labels)
+
+    def expose(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REGISTRY.histogram("charbible_rerun_seconds", "Full script run time")
+REGISTRY.histogram("charbible_section_seconds", "Section body time, including fragment reruns")
+REGISTRY.histogram("charbible_render_seconds", "Time to produce a bible or voice card (cache hits included)")
+REGISTRY.histogram("charbible_payload_bytes", "Bytes sent in previews and download buttons", BYTES_BUCKETS)
+REGISTRY.histogram("charbible_session_state_bytes", "Approximate session_state size per run", BYTES_BUCKETS)
+REGISTRY.histogram("charbible_session_save_seconds", "Time to write a run's changes to the session backend")
+
+
+@contextmanager
+def timed(name, registry=REGISTRY, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - started, **labels)
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+def start_http_exporter(port, registry=REGISTRY, host="127.0.0.1"):
+    """Serve GET /metrics on a daemon thread. Returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.expose().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="charbible-metrics-http", daemon=True).start()
+    return server
+
+
+def start_file_exporter(path, interval=5.0, registry=REGISTRY):
+    """Rewrite `path` (node_exporter textfile format) every `interval` seconds.
+
+    A failed write (directory missing, disk full...) is reported on stderr
+    and retried on the next interval; the same error is only reported once.
+    """
+
+    def run():
+        failing = None
+        while True:
+            tmp = f"{path}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    fh.write(registry.expose())
+                os.replace(tmp, path)
+            except OSError as e:
+                if str(e) != failing:
+                    print(f"charbible metrics: can't write {path}: {e}; retrying every {interval:g}s",
+                          file=sys.stderr)
+                    failing = str(e)
+            else:
+                if failing is not None:
+                    print(f"charbible metrics: writing {path} again", file=sys.stderr)
+                    failing = None
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="charbible-metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporters_from_env(registry=REGISTRY):
+    """Start whichever exporters the environment asks for. Call once per process."""
+    started = []
+    port = os.environ.get("CHARBIBLE_METRICS_PORT")
+    if port:
+        started.append(start_http_exporter(int(port), registry))
+    path = os.environ.get("CHARBIBLE_METRICS_FILE")
+    if path:
+        started.append(start_file_exporter(path, registry=registry))
+    return started
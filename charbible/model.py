@@ -0,0 +1,135 @@
+"""
+CharacterBible — a compact, Streamlit-free persona record.
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from .schema import FIELD_KEYS, FIELDS_BY_KEY
+
+_SPACES = re.compile(r"[^\S\n]{2,}|[^\S\n ]")  # runs, tabs, NBSPs...: anything but one plain space
+_LINE_EDGES = re.compile(r" \n ?|\n ")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_UNICODE_FOLD = {**dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff")),  # invisible: dropped
+                 **dict.fromkeys(map(ord, "\x85\u2028\u2029"), "\n")}
+_UNSAFE_IN_FILENAME = re.compile(r"[^\w.-]+")  # "/" would make "AC/DC Fan" a directory
+_MULTILINE = frozenset(key for key, field in FIELDS_BY_KEY.items() if field.widget == "text_area")
+
+
+def canonical_text(value, multiline=True):
+    """NFC, one kind of line break and space, lines stripped, at most one blank line in a row.
+
+    Single-line values are folded onto one line.
+    """
+    if not value.isascii():
+        value = unicodedata.normalize("NFC", value).translate(_UNICODE_FOLD)
+    value = value.replace("\r\n", "\n").replace("\r", "\n")
+    if not multiline:
+        value = value.replace("\n", " ")
+    value = _SPACES.sub(" ", value)
+    if multiline:
+        if " \n" in value or "\n " in value:
+            value = _LINE_EDGES.sub("\n", value)
+        if "\n\n\n" in value:
+            value = _BLANK_LINES.sub("\n\n", value)
+    return value.strip()
+
+
+class CharacterBible:
+    """One persona. Attributes are exactly the schema field keys."""
+
+    __slots__ = FIELD_KEYS
+
+    def __init__(self, **values):
+        for key in FIELD_KEYS:
+            value = values.pop(key, "")
+            setattr(self, key, "" if value is None else str(value))
+        if values:
+            raise TypeError(f"Unknown character fields: {', '.join(sorted(values))}")
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """Build from any mapping (a dict, st.session_state, a CSV row...).
+
+        Keys that are not schema fields are ignored.
+        """
+        self = object.__new__(cls)
+        get = mapping.get
+        for key in FIELD_KEYS:
+            value = get(key, "")
+            setattr(self, key, "" if value is None else str(value))
+        return self
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in FIELD_KEYS}
+
+    def values(self):
+        return tuple(getattr(self, key) for key in FIELD_KEYS)
+
+    def content_hash(self):
+        """Stable hex digest of every field value, in schema order."""
+        # NUL never comes out of a text widget, so it is a safe separator
+        data = "\0".join(self.values()).encode("utf-8", "surrogatepass")
+        return hashlib.sha256(data).hexdigest()
+
+    def canonical(self):
+        """Copy with whitespace and Unicode normalised (canonical_text), so personas
+        that differ only in how they were typed render to identical bytes."""
+        return _CanonicalBible.from_mapping(
+            {key: canonical_text(getattr(self, key), key in _MULTILINE) for key in FIELD_KEYS})
+
+    def lines(self, key):
+        """Non-empty, stripped lines of a one-item-per-line field."""
+        return [line.strip() for line in getattr(self, key).strip().split("\n") if line.strip()]
+
+    def numbered(self, prefix, count):
+        """Values of prefix_1 .. prefix_<count> (opinions, contradictions)."""
+        return [getattr(self, f"{prefix}_{i}") for i in range(1, count + 1)]
+
+    @property
+    def name(self):
+        return self.char_name
+
+    @property
+    def slug(self):
+        """A file stem: lowercase, runs of anything but word characters, "." and "-" as "_"."""
+        stem = _UNSAFE_IN_FILENAME.sub("_", self.char_name.lower()).lstrip("._").rstrip("_")
+        return stem or "character"
+
+    def missing_required(self):
+        return [key for key, field in FIELDS_BY_KEY.items()
+                if field.required and not getattr(self, key).strip()]
+
+    def __eq__(self, other):
+        if not isinstance(other, CharacterBible):
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __repr__(self):
+        return f"CharacterBible(char_name={self.char_name!r})"
+
+
+class _CanonicalBible(CharacterBible):
+    """What canonical() returns; normalising it again is a no-op."""
+
+    __slots__ = ()
+
+    def canonical(self):
+        return self
+
+    def __repr__(self):
+        return f"CharacterBible(char_name={self.char_name!r}, canonical)"
+
+
+class UniqueSlugs:
+    """Hands out unique file stems so two 'Nigel's don't overwrite each other."""
+
+    def __init__(self):
+        self.seen = {}
+
+    def __call__(self, name):
+        stem = CharacterBible(char_name=name or "").slug
+        n = self.seen.get(stem, 0) + 1
+        self.seen[stem] = n
+        return stem if n == 1 else f"{stem}_{n}"
@@ -0,0 +1,55 @@
+"""
+House example personas, shipped as a pack of JSON files.
+
+index.json lists every preset (id, name, blurb, file). A preset's fields
+are read from its own file only when it is applied, and only the few most
+recently used are kept in memory, so adding presets to the pack costs disk,
+not RAM or rerun time.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from ..cache import LRUCache
+from ..schema import FIELD_KEYS
+
+PRESET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass(frozen=True)
+class Preset:
+    id: str
+    name: str
+    blurb: str
+    file: str
+
+
+class PresetPack:
+    """The index of a preset directory, with per-preset fields loaded on demand."""
+
+    def __init__(self, directory=PRESET_DIR, cached=4):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as fh:
+            self.presets = tuple(Preset(**entry) for entry in json.load(fh)["presets"])
+        self.by_id = {preset.id: preset for preset in self.presets}
+        self._fields = LRUCache(maxsize=cached)
+
+    def __len__(self):
+        return len(self.presets)
+
+    def __iter__(self):
+        return iter(self.presets)
+
+    def fields(self, preset_id):
+        """A read-only {field key: value} mapping for one preset."""
+        return self._fields.get_or_create(preset_id, lambda: self._load(self.by_id[preset_id]))
+
+    def _load(self, preset):
+        with open(os.path.join(self.directory, preset.file), encoding="utf-8") as fh:
+            values = json.load(fh)
+        unknown = set(values) - set(FIELD_KEYS)
+        if unknown:
+            raise ValueError(f"preset {preset.id!r} has unknown fields: {', '.join(sorted(unknown))}")
+        return MappingProxyType(values)
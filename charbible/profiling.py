@@ -0,0 +1,179 @@
+"""
+Opt-in per-run profiling with cProfile and tracemalloc.
+
+Switched on by CHARBIBLE_PROFILE=1 (every session) or ?profile=1 (one
+session). Each profiled run writes a pstats file and a tracemalloc snapshot
+to CHARBIBLE_PROFILE_DIR (default ./profiles); only the newest
+CHARBIBLE_PROFILE_KEEP runs (default 20) are kept on disk. When profiling is
+off, start() returns None and nothing is imported, traced or written, and
+tracemalloc is stopped again once the last profiled run in the process ends.
+
+    python -m pstats profiles/run-....prof
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENV_FLAG = "CHARBIBLE_PROFILE"
+
+
+def enabled(query_flag=None):
+    return os.environ.get(ENV_FLAG) == "1" or query_flag == "1"
+
+
+class ProfiledRun:
+    """One script or fragment run under cProfile, with tracemalloc traced."""
+
+    def __init__(self, profiler, label):
+        import cProfile
+        import tracemalloc
+
+        self.profiler = profiler
+        self.label = label
+        profiler._acquire_tracing()
+        self.before = tracemalloc.take_snapshot()
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        import tracemalloc
+
+        self.profile.disable()
+        seconds = time.perf_counter() - self.started
+        after = tracemalloc.take_snapshot()
+        self.profiler._release_tracing()
+        return self.profiler._record(self, seconds, after)
+
+    def abandon(self):
+        """Stop without recording (the run was cut short)."""
+        self.profile.disable()
+        self.profiler._release_tracing()
+
+
+class Profiler:
+    """Collects profiled runs, rotates their files and aggregates the recent ones."""
+
+    def __init__(self, directory=None, keep=None, frames=1):
+        self.directory = directory or os.environ.get("CHARBIBLE_PROFILE_DIR", "profiles")
+        self.keep = keep or int(os.environ.get("CHARBIBLE_PROFILE_KEEP", "20"))
+        self.frames = frames
+        self.recent = deque(maxlen=self.keep)  # (label, seconds, function rows, allocation rows)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._tracing = 0  # profiled runs in flight, on any thread
+        self._started_tracing = False  # so tracing someone else switched on is left alone
+
+    def _acquire_tracing(self):
+        import tracemalloc
+
+        with self._lock:
+            if self._tracing == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._started_tracing = True
+            self._tracing += 1
+
+    def _release_tracing(self):
+        """Stop tracemalloc when the last profiled run ends, so unprofiled sessions pay nothing."""
+        import tracemalloc
+
+        with self._lock:
+            self._tracing -= 1
+            if self._tracing == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def start(self, label):
+        """Begin profiling this thread's run. Returns the run, or None if one is active."""
+        active = getattr(self._local, "run", None)
+        if active is not None:
+            if active.label == label:  # interrupted by st.rerun(); its profile is lost
+                active.abandon()
+            else:
+                return None
+        self._local.run = ProfiledRun(self, label)
+        return self._local.run
+
+    def finish(self, run):
+        if run is None:
+            return None
+        self._local.run = None
+        return run.stop()
+
+    @contextmanager
+    def run(self, label):
+        """Profile the block unless a run is already active on this thread."""
+        run = self.start(label) if getattr(self._local, "run", None) is None else None
+        try:
+            yield
+        finally:
+            self.finish(run)
+
+    def _record(self, run, seconds, after):
+        import pstats
+        import tracemalloc
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._seq += 1
+            stem = os.path.join(self.directory, f"run-{time.strftime('%Y%m%d-%H%M%S')}-{self._seq:05d}")
+        run.profile.dump_stats(stem + ".prof")
+        after.dump(stem + ".tracemalloc")
+        # Summarise now so the admin view never loads profiles inside a profiled run
+        functions = sorted(
+            ((f"{name} ({os.path.basename(filename)}:{line})", calls, tottime, cumtime)
+             for (filename, line, name), (_, calls, tottime, cumtime, _)
+             in pstats.Stats(run.profile).stats.items()),
+            key=lambda row: row[3], reverse=True)[:200]
+        own = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, pstats.__file__)]
+        allocations = [
+            (str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+            for stat in after.filter_traces(own).compare_to(run.before.filter_traces(own), "lineno")[:50]
+            if stat.size_diff > 0
+        ]
+        with self._lock:
+            self.recent.append((run.label, seconds, functions, allocations))
+            self._rotate()
+        return stem
+
+    def _rotate(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith("run-"))
+        stems = sorted({n.rsplit(".", 1)[0] for n in names})
+        for stem in stems[:-self.keep]:
+            for suffix in (".prof", ".tracemalloc"):
+                try:
+                    os.remove(os.path.join(self.directory, stem + suffix))
+                except OSError:
+                    pass
+
+    def top_functions(self, limit=20):
+        """Functions by cumulative time summed over the recent runs."""
+        totals = {}
+        for _, _, functions, _ in list(self.recent):
+            for function, calls, tottime, cumtime in functions:
+                entry = totals.setdefault(function, [0, 0.0, 0.0])
+                entry[0] += calls
+                entry[1] += tottime
+                entry[2] += cumtime
+        rows = [{"function": function, "calls": calls,
+                 "tottime_ms": round(tottime * 1000, 2), "cumtime_ms": round(cumtime * 1000, 2)}
+                for function, (calls, tottime, cumtime) in totals.items()]
+        rows.sort(key=lambda row: row["cumtime_ms"], reverse=True)
+        return rows[:limit]
+
+    def top_allocations(self, limit=20):
+        """Allocation sites by bytes retained, summed over the recent runs."""
+        totals = {}
+        for _, _, _, allocations in list(self.recent):
+            for site, size, count in allocations:
+                entry = totals.setdefault(site, [0, 0])
+                entry[0] += size
+                entry[1] += count
+        rows = [{"site": site, "kb": round(size / 1024, 1), "blocks": count}
+                for site, (size, count) in totals.items()]
+        rows.sort(key=lambda row: row["kb"], reverse=True)
+        return rows[:limit]
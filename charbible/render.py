@@ -0,0 +1,402 @@
+"""
+Pure renderers for the Full Character Bible and the Voice Card.
+
+Importable without Streamlit: give them a CharacterBible, get markdown back.
+"""
+
+import re
+from datetime import date
+from string import Formatter
+
+FULL_BIBLE_TEMPLATE = """# Character Bible: {title}
+*Generated {generated}*
+
+---
+
+## 🎭 CORE IDENTITY
+
+**Name:** {char_name}  
+**Role:** {char_role}  
+**Content Category:** {content_category}
+
+**One-Line Essence:**
+> {one_liner}
+
+**The Contradiction:**
+> {the_contradiction}
+
+**Age/Era Feel:** {age_era}
+
+---
+
+## 🌍 REGIONALITY & CULTURAL ROOTS
+
+**From:** {origin_place}
+
+**Regional Quirks:**
+{regional_quirks}
+
+**Class Background:**
+{class_background}
+
+**Relationship with Home:**
+{relationship_home}
+
+**Cultural Touchstones:**
+{cultural_touchstones}
+
+**Accent Notes:**
+{accent_notes}
+
+**Local References They'd Drop:**
+{local_references}
+
+---
+
+## 📜 BACKSTORY & FORMATION
+
+**Origin Story:**
+{origin_story}
+
+### Defining Hardships
+
+**Hardship #1:**
+{hardship_1}
+
+**Hardship #2:**
+{hardship_2}
+
+**Hardship #3:**
+{hardship_3}
+
+**The Wound:**
+{the_wound}
+
+**The Triumph:**
+{the_triumph}
+
+**What They're Still Running From:**
+{running_from}
+
+**What They're Still Chasing:**
+{chasing}
+
+**Formative Relationships:**
+{formative_relationships}
+
+---
+
+## 🗣️ VOICE & STYLE
+
+**Voice:** {voice_description}
+
+**Tone:** {tone}
+
+**Style Keywords:** {style_keywords}
+
+**Analogy:** {voice_analogy}
+
+---
+
+## 💬 COMMUNICATION FINGERPRINT
+
+**Sentence Structure:** {sentence_structure}
+
+**Verbal Tics:** {verbal_tics}
+
+**How They Start Thoughts:** {how_they_start}
+
+**How They End Thoughts:** {how_they_end}
+
+**Signature Phrases:**
+{signature_phrases}
+
+**How They Curse:** {how_they_curse}
+
+**How They Compliment:** {how_they_compliment}
+
+**How They Apologize:** {how_they_apologize}
+
+**Storytelling Style:** {storytelling_style}
+
+### Reference Worlds
+
+**Primary:** {reference_primary}
+
+**Secondary:** {reference_secondary}
+
+**Never References:** {reference_never}
+
+---
+
+## 🔥 OPINIONS & HOT TAKES
+
+1. {opinion_1}
+2. {opinion_2}
+3. {opinion_3}
+4. {opinion_4}
+5. {opinion_5}
+6. {opinion_6}
+7. {opinion_7}
+
+### Pet Peeves
+{pet_peeves}
+
+### Contradictions & Inconsistencies
+- {contradiction_1}
+- {contradiction_2}
+- {contradiction_3}
+- {contradiction_4}
+- {contradiction_5}
+
+---
+
+## 💭 EMOTIONAL LANDSCAPE
+
+**Resting Emotional State:**
+{resting_state}
+
+**Lights Up When:**
+{lights_up}
+
+**Shuts Down When:**
+{shuts_down}
+
+**How They Handle Failure:**
+{handles_failure}
+
+**How They Celebrate Wins:**
+{celebrates_wins}
+
+**Guilty Pleasures:**
+{guilty_pleasures}
+
+**What Makes Them Cry:** {what_makes_cry}
+
+---
+
+## 🧠 KNOWLEDGE & EXPERTISE
+
+**Knows Cold:**
+{knows_cold}
+
+**Thinks They Know:**
+{thinks_knows}
+
+**Surprising Gaps:**
+{knowledge_gaps}
+
+**Niche Interests:**
+{niche_interests}
+
+---
+
+## 👁️ PHYSICAL & SENSORY WORLD
+
+**How They Move:** {how_they_move}
+
+**Physical Habits:** {physical_habits}
+
+**Sensory Loves:** {sensory_loves}
+
+**Sensory Hates:** {sensory_hates}
+
+**Comfort Foods:** {comfort_foods}
+
+**Always in Pockets:** {in_pockets}
+
+---
+
+## ☕ DAILY LIFE & RITUALS
+
+**Morning Routine:**
+{morning_routine}
+
+**Non-Negotiable Rituals:**
+{rituals}
+
+**How They Unwind:**
+{unwind}
+
+**Vices:**
+{vices}
+
+---
+
+## 🔒 SECRET SELF
+
+**Private Thoughts:**
+{private_thoughts}
+
+**Hidden Insecurities:**
+{hidden_insecurities}
+
+**Secret Dreams:**
+{secret_dreams}
+
+**At 3am Alone:**
+{at_3am}
+
+---
+
+## 🚧 GUARDRAILS — NEVER DO
+
+{never_do}
+
+---
+
+## 👔 APPEARANCE
+
+{appearance}
+
+**Color Palette:** {color_palette}
+
+**Visual Motifs:** {visual_motifs}
+
+**Aesthetic:** {aesthetic}
+
+---
+
+## 📻 CONTENT
+
+**Title:** {podcast_title}
+
+**Description:**
+{podcast_description}
+
+**Taglines:**
+{taglines}
+
+---
+
+*Generated with Character Bible Builder v2.0 ⚡ QP-1 Productions*
+"""
+
+VOICE_CARD_TEMPLATE = """# {title} — Voice Card
+
+## CORE ESSENCE
+{one_liner} {the_contradiction}
+
+## VOICE & TONE
+- **Voice:** {voice_description}
+- **Tone:** {tone}
+- **Style Keywords:** {style_keywords}
+- **Analogy:** {voice_analogy}
+
+## SPEECH PATTERNS
+- **Sentence structure:** {sentence_structure}
+- **Verbal tics:** {verbal_tics}
+- **Starts with:** {how_they_start}
+- **Ends with:** {how_they_end}
+
+## SIGNATURE PHRASES
+{phrases_formatted}
+
+## REFERENCE WORLDS
+- **Primary:** {reference_primary}
+- **Secondary:** {reference_secondary}
+- **Never references:** {reference_never}
+
+## OPINIONS & HOT TAKES
+{opinions_formatted}
+
+## PET PEEVES
+{peeves_formatted}
+
+## CONTRADICTIONS
+{contradictions_formatted}
+
+## EXPERTISE & GAPS
+- **Knows cold:** {knows_cold}
+- **Thinks they know:** {thinks_knows}
+- **Surprising gaps:** {knowledge_gaps}
+
+## EMOTIONAL CUES
+- **Lights up when:** {lights_up}
+- **Shuts down when:** {shuts_down}
+- **Resting state:** {resting_state}
+
+## NEVER DO THIS
+{nevers_formatted}
+"""
+
+
+class CompiledTemplate:
+    """A format template parsed once into alternating literals and field names."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, template):
+        self.parts = tuple((literal, name) for literal, name, _, _ in Formatter().parse(template))
+
+    def render(self, values):
+        out = []
+        for literal, name in self.parts:
+            out.append(literal)
+            if name is not None:
+                out.append(values[name])
+        return "".join(out)
+
+
+FULL_BIBLE = CompiledTemplate(FULL_BIBLE_TEMPLATE)
+# The same document without the date line, so it depends on nothing but the persona
+CANONICAL_BIBLE = CompiledTemplate(FULL_BIBLE_TEMPLATE.replace("*Generated {generated}*\n", "", 1))
+VOICE_CARD = CompiledTemplate(VOICE_CARD_TEMPLATE)
+
+
+def render_full_bible(bible, generated=None, canonical=False):
+    """Full reference document. `generated` is the date stamped under the title.
+
+    canonical=True renders bible.canonical() with no date, so the same persona
+    always comes out as the same bytes.
+    """
+    if canonical:
+        bible = bible.canonical()
+    values = bible.to_dict()
+    values["title"] = bible.char_name or "Unnamed Character"
+    if canonical:
+        return CANONICAL_BIBLE.render(values)
+    values["generated"] = (generated or date.today()).strftime("%B %d, %Y")
+    return FULL_BIBLE.render(values)
+
+
+def render_voice_card(bible, canonical=False):
+    """Condensed card for pasting into script prompts. canonical=True: from bible.canonical()."""
+    if canonical:
+        bible = bible.canonical()
+    # First 12 signature phrases
+    phrases_formatted = "\n".join(f'- "{p}"' for p in bible.lines("signature_phrases")[:12])
+
+    opinions_formatted = "\n".join(
+        f"{i}. {op}" for i, op in enumerate(bible.numbered("opinion", 7), 1) if op)
+
+    peeves_formatted = "\n".join(f"- {p}" for p in bible.lines("pet_peeves")[:5])
+
+    contradictions_formatted = "\n".join(
+        f"- {c}" for c in bible.numbered("contradiction", 5) if c)
+
+    nevers_formatted = "\n".join(f"- Never: {n.lstrip('- ')}" for n in bible.lines("never_do")[:5])
+
+    values = bible.to_dict()
+    values.update(
+        title=bible.char_name or "CHARACTER",
+        phrases_formatted=phrases_formatted,
+        opinions_formatted=opinions_formatted,
+        peeves_formatted=peeves_formatted,
+        contradictions_formatted=contradictions_formatted,
+        nevers_formatted=nevers_formatted,
+    )
+    return VOICE_CARD.render(values)
+
+
+_HEADING = re.compile(r"^## ", re.M)
+
+
+def markdown_sections(text):
+    """[(heading, chunk)], split before each "## " heading; the chunks join back into `text`.
+
+    Whatever precedes the first heading comes first, under the "# " title.
+    """
+    starts = [0] + [m.start() for m in _HEADING.finditer(text) if m.start()]
+    chunks = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+    return [(chunk.split("\n", 1)[0].lstrip("#").strip(), chunk) for chunk in chunks if chunk]
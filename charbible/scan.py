@@ -0,0 +1,199 @@
+"""
+Transcript conformance scanning: voice drift and guardrail violations.
+
+A PersonaScanner is built once per persona. It extracts literal patterns
+from the bible and compiles them into a single Aho-Corasick automaton, so
+each transcript is scanned in one pass however many patterns there are:
+
+    voice      signature_phrases, verbal_tics, how_they_start, how_they_end
+    violation  reference_never terms, quoted terms in never_do, and a small
+               lexicon for common never_do rules (AI self-reference,
+               internet speak, slang)
+
+Matching is case-insensitive, ignores punctuation and only matches whole
+words. Drift is 1 - min(1, voice hits per 1000 words / target rate): 0 means
+the transcript sounds like the persona, 1 means none of its voice showed up.
+"""
+
+import re
+from dataclasses import dataclass
+
+VOICE, VIOLATION = "voice", "violation"
+
+DEFAULT_TARGET_RATE = 5.0  # voice hits per 1000 words that count as fully on-voice
+DEFAULT_DRIFT_THRESHOLD = 0.6
+MAX_REPORTED_VIOLATIONS = 20
+
+# never_do rules are instructions, not literal text; these map common ones
+# to phrases that give them away.
+GUARDRAIL_LEXICON = (
+    (re.compile(r"\bAI\b|artificial intelligence", re.I),
+     ("as an ai", "language model", "i'm an ai", "i am an ai", "artificial intelligence")),
+    (re.compile(r"internet|online", re.I), ("lol", "lmao", "omg", "tbh", "imo", "smh", "irl")),
+    (re.compile(r"slang", re.I), ("awesome", "dude", "bro", "no cap", "y'all", "gonna", "wanna")),
+)
+
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "ʼ": "'"})
+_NON_WORD = re.compile(r"[^\w']+")
+_PARENTHETICAL = re.compile(r"\s*\([^)]*\)")
+_QUOTED = re.compile(r"\"([^\"]+)\"|“([^”]+)”|(?<!\w)'([^']+)'(?!\w)")
+_LIST_SPLIT = re.compile(r"[,/;\n]")    # "Now then (to begin), Mm (to acknowledge)"
+_PHRASE_SPLIT = re.compile(r"[/;\n]")   # "Now then... / Right, so..."
+
+
+def normalize(text):
+    """Lowercase, unify apostrophes, collapse punctuation and whitespace to single spaces."""
+    return _NON_WORD.sub(" ", text.translate(_APOSTROPHES).lower()).strip()
+
+
+@dataclass(frozen=True)
+class Pattern:
+    text: str    # normalised
+    kind: str    # VOICE or VIOLATION
+    source: str  # field key it came from
+    rule: str    # the original line, for reporting
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over strings; one pass per text, overlapping matches."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        goto = [{}]
+        outputs = [[]]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = goto[node][ch] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                node = nxt
+            outputs[node].append(index)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:  # breadth-first; the list grows as we go
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0)
+                outputs[child].extend(outputs[fail[child]])
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def finditer(self, text):
+        """Yield (end offset, pattern index) for every occurrence."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if outputs[node]:
+                for index in outputs[node]:
+                    yield i + 1, index
+
+
+def markers(value, split=_LIST_SPLIT):
+    """Short literal markers from a free-text list field, parentheticals removed."""
+    out = []
+    for part in split.split(_PARENTHETICAL.sub("", value)):
+        part = normalize(part)
+        if part and len(part.split()) <= 6:
+            out.append(part)
+    return out
+
+
+def violation_patterns(bible):
+    """Patterns the persona must never say: never_do and reference_never."""
+    found = []
+    for rule in bible.lines("never_do"):
+        for groups in _QUOTED.findall(rule):
+            found.append(Pattern(normalize("".join(groups)), VIOLATION, "never_do", rule))
+        for trigger, phrases in GUARDRAIL_LEXICON:
+            if trigger.search(rule):
+                found.extend(Pattern(phrase, VIOLATION, "never_do", rule) for phrase in phrases)
+    for term in markers(bible.reference_never):
+        found.append(Pattern(term, VIOLATION, "reference_never", bible.reference_never.strip()))
+    return found
+
+
+def voice_patterns(bible):
+    """Patterns that show the persona's voice: signature phrases and tics."""
+    found = []
+    for line in bible.lines("signature_phrases"):
+        found.append(Pattern(normalize(_PARENTHETICAL.sub("", line)), VOICE, "signature_phrases", line))
+    for key, split in (("verbal_tics", _LIST_SPLIT), ("how_they_start", _PHRASE_SPLIT),
+                       ("how_they_end", _PHRASE_SPLIT)):
+        for marker in markers(getattr(bible, key), split):
+            found.append(Pattern(marker, VOICE, key, getattr(bible, key).strip()))
+    return found
+
+
+def extract_patterns(bible):
+    """The persona's literal patterns, violations first; duplicates keep the first kind."""
+    patterns = {}
+    for pattern in violation_patterns(bible) + voice_patterns(bible):
+        if pattern.text and pattern.text not in patterns:
+            patterns[pattern.text] = pattern
+    return list(patterns.values())
+
+
+class PersonaScanner:
+    """Scores transcripts against one persona. Build once, scan many."""
+
+    def __init__(self, bible, target_rate=DEFAULT_TARGET_RATE, drift_threshold=DEFAULT_DRIFT_THRESHOLD):
+        self.patterns = extract_patterns(bible)
+        self.voice_count = sum(p.kind == VOICE for p in self.patterns)
+        self.target_rate = target_rate
+        self.drift_threshold = drift_threshold
+        # Pad with spaces so every match is a whole word or phrase
+        self.matcher = AhoCorasick(f" {p.text} " for p in self.patterns)
+
+    def scan(self, text, episode=None):
+        normalized = f" {normalize(text)} "
+        words = normalized.count(" ") - 1 if normalized.strip() else 0
+        voice_hits = 0
+        voice_seen = set()
+        violations = []
+        violation_count = 0
+        for end, index in self.matcher.finditer(normalized):
+            pattern = self.patterns[index]
+            if pattern.kind == VOICE:
+                voice_hits += 1
+                voice_seen.add(index)
+                continue
+            violation_count += 1
+            if len(violations) < MAX_REPORTED_VIOLATIONS:
+                start = end - len(pattern.text) - 2
+                violations.append({
+                    "pattern": pattern.text,
+                    "source": pattern.source,
+                    "rule": pattern.rule,
+                    "context": normalized[max(0, start - 40):end + 40].strip(),
+                })
+
+        rate = voice_hits * 1000 / words if words else 0.0
+        drift = round(1 - min(1.0, rate / self.target_rate), 3) if words else None
+        if violation_count:
+            status = "violation"
+        elif drift is not None and drift > self.drift_threshold:
+            status = "drift"
+        else:
+            status = "ok"
+        return {
+            "episode": episode,
+            "status": status,
+            "words": words,
+            "voice_hits": voice_hits,
+            "hits_per_1k": round(rate, 2),
+            "coverage": round(len(voice_seen) / self.voice_count, 3) if self.voice_count else None,
+            "drift": drift,
+            "violation_count": violation_count,
+            "violations": violations,
+        }
@@ -0,0 +1,241 @@
+"""
+Declarative field schema for a Character Bible.
+
+Every persona field is declared exactly once here. The Streamlit wizard,
+the CharacterBible model and the renderers all read from this schema.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Section:
+    title: str
+    header: str
+    help: str = ""
+
+
+@dataclass(frozen=True)
+class Field:
+    key: str
+    label: str
+    section: int
+    placeholder: str = ""
+    required: bool = False
+    widget: str = "text_input"  # or "text_area"
+    height: int = None
+    is_list: bool = False  # one item per line
+
+    @property
+    def form_label(self):
+        return self.label + ("*" if self.required else "")
+
+
+SECTIONS = (
+    Section("Identity Core", "🎭 Identity Core",
+            'The essential "who" — capture the contradiction that makes them interesting.'),
+    Section("Regionality", "🌍 Regionality & Cultural Roots",
+            "Where they're from shapes how they speak, what they reference, and how they see the world."),
+    Section("Backstory", "📜 Backstory & Formation",
+            "The experiences that made them who they are — including the hardships that left marks."),
+    Section("Voice & Style", "🗣️ Voice & Style",
+            "How they sound — the texture and feel of their communication."),
+    Section("Communication", "💬 Communication Fingerprint",
+            "The specific patterns that make their speech unique — this is what makes scripts sound authentically like them."),
+    Section("Opinions & Takes", "🔥 Opinions & Hot Takes",
+            "Characters with OPINIONS feel real. Generic = death. Give them specific, sometimes irrational stances."),
+    Section("Emotional Landscape", "💭 Emotional Landscape",
+            "How they feel, what triggers them, how they handle highs and lows."),
+    Section("Knowledge", "🧠 Knowledge & Expertise",
+            "What they know, what they think they know, and what they surprisingly don't."),
+    Section("Physical World", "👁️ Physical & Sensory World",
+            "How they exist in physical space — useful for visual content and grounding."),
+    Section("Daily Life", "☕ Daily Life & Rituals",
+            "The routines that ground them — useful for relatable content and character consistency."),
+    Section("Secret Self", "🔒 Secret Self",
+            "The private inner life that adds depth even if it rarely surfaces directly."),
+    Section("Guardrails", "🚧 Guardrails",
+            "The hard boundaries — things that would instantly break character."),
+    Section("Appearance", "👔 Appearance & Visual Identity",
+            "How they look and the visual world of the brand — useful for thumbnails, avatars, and imagery."),
+    Section("Generate", "✨ Generate Character Bible"),
+)
+
+GENERATE_SECTION = len(SECTIONS) - 1
+
+
+def _input(key, label, section, placeholder="", required=False):
+    return Field(key, label, section, placeholder, required)
+
+
+def _area(key, label, section, placeholder="", height=80, required=False, is_list=False):
+    return Field(key, label, section, placeholder, required, "text_area", height, is_list)
+
+
+FIELDS = (
+    # Identity
+    _input("char_name", "Character Name", 0, "e.g., Nigel Thistledown", required=True),
+    _input("char_role", "Role/Title", 0, "e.g., Eccentric English Horticulturalist", required=True),
+    _input("one_liner", "One-Line Essence", 0,
+           "e.g., A botanical philosopher who treats gardens like therapy patients and weeds like personal vendettas",
+           required=True),
+    _area("the_contradiction", "The Contradiction", 0,
+          "The central tension that makes them interesting. e.g., 'Deeply knowledgeable but plagued by imposter syndrome. Publicly confident, privately convinced someone will discover he's making it all up.'",
+          height=100, required=True),
+    _input("age_era", "Age/Era Feel", 0,
+           "e.g., Mid-60s in spirit — grew up before the internet, still sends handwritten notes"),
+    _input("content_category", "Content Category (Spotify/Apple format)", 0,
+           "e.g., Home & Garden > Gardening"),
+
+    # Regionality
+    _input("origin_place", "Where They're From", 1,
+           "Specific place, not just country — e.g., Nether Wallop, Hampshire, England", required=True),
+    _area("regional_quirks", "Regional Quirks", 1,
+          "Local slang, references only people from there would know, regional opinions...", height=100),
+    _area("class_background", "Class Background", 1,
+          "How does their class/socioeconomic background show up in speech, attitudes, insecurities?"),
+    _area("relationship_home", "Relationship with Home", 1,
+          "Proud? Escaped? Nostalgic? Complicated?"),
+    _area("cultural_touchstones", "Cultural Touchstones", 1,
+          "The music, shows, foods, sports teams, books that shaped them"),
+    _area("accent_notes", "Accent Notes", 1,
+          "Not just 'British' — what kind? How strong? When does it slip?"),
+    _area("local_references", "Local References They'd Drop", 1,
+          "Specific places, inside jokes, regional pride/shame expressions"),
+
+    # Backstory
+    _area("origin_story", "Origin Story", 2,
+          "The spark that made them who they are. What drew them to this path?", height=120, required=True),
+    _area("hardship_1", "Hardship #1", 2,
+          "Name it, age it happened, what happened, the emotional residue"),
+    _area("hardship_2", "Hardship #2", 2, "Another defining struggle..."),
+    _area("hardship_3", "Hardship #3", 2, "A third challenge that shaped them..."),
+    _area("the_wound", "The Wound", 2, "The deep hurt they carry, even if they joke about it"),
+    _area("the_triumph", "The Triumph", 2, "The moment they proved themselves"),
+    _area("running_from", "What They're Still Running From", 2, "The fear or pain they haven't resolved"),
+    _area("chasing", "What They're Still Chasing", 2, "The thing they still want but haven't gotten"),
+    _area("formative_relationships", "Formative Relationships", 2,
+          "Who shaped them — mentors, rivals, lost loves, enemies, friends...", height=100),
+
+    # Voice & Style
+    _area("voice_description", "Voice Description", 3,
+          "How they sound overall — warm? sharp? tired? energetic? e.g., 'Warm, worn, witty — a well-used armchair of a voice'",
+          required=True),
+    _area("tone", "Tone", 3,
+          "Playful? Serious? Sarcastic? Gentle? e.g., 'Playful but never shallow; self-deprecating but never self-pitying'",
+          required=True),
+    _input("style_keywords", "Style Keywords (5-7)", 3,
+           "e.g., Eccentric, botanical, timeless, cheeky, wry, wise, melancholic-around-edges"),
+    _input("voice_analogy", "Voice Analogy", 3,
+           "They sound like... (a well-worn armchair / tea with whiskey / a caffeinated professor)"),
+
+    # Communication
+    _input("sentence_structure", "Sentence Structure", 4,
+           "Long and winding? Short and punchy? Question-heavy? e.g., 'Long sentences that seem like tangents until they land perfectly'"),
+    _input("verbal_tics", "Verbal Tics", 4,
+           "Repeated words/sounds — e.g., 'Now then (to begin), Mm (to acknowledge), Right (as punctuation)'"),
+    _input("how_they_start", "How They Start Thoughts", 4, "e.g., 'Now then...' / 'So here's the thing...'"),
+    _input("how_they_end", "How They End Thoughts", 4, "e.g., '...if you follow' / '...but there we are'"),
+    _area("signature_phrases", "Signature Phrases (10-15)", 4,
+          "One per line — lines ONLY this character would say. These should be quotable and personality-revealing.",
+          height=200, required=True, is_list=True),
+    _area("how_they_curse", "How They Curse", 4,
+          "Do they? How? Creatively? Euphemisms? e.g., 'Rarely, botanically. Oh, for the love of compost.'", height=60),
+    _area("how_they_compliment", "How They Compliment", 4,
+          "Direct? Backhanded? Awkward? e.g., 'Indirectly. That's not terrible = excellent.'", height=60),
+    _area("how_they_apologize", "How They Apologize", 4,
+          "Easily? Never? Through actions? e.g., 'Awkwardly, often through plants.'", height=60),
+    _area("storytelling_style", "Storytelling Style", 4,
+          "How do they tell stories? Tangents? Chronological? Dramatic pauses?", height=60),
+    _input("reference_primary", "Primary References", 4,
+           "Main domain — e.g., Shakespeare, botanical Latin, British understatement"),
+    _input("reference_secondary", "Secondary References", 4,
+           "Supporting references — e.g., Radio 4, tea culture, Victorian garden history"),
+    _input("reference_never", "Never References", 4,
+           "What's off-brand? e.g., American pop culture, modern slang, sports"),
+
+    # Opinions & Takes
+    _input("opinion_1", "Opinion 1", 5, "[Topic]: [Their take] — e.g., Lawns: 'The carpet of the unimaginative'"),
+    *(_input(f"opinion_{i}", f"Opinion {i}", 5, "[Topic]: [Their take]") for i in range(2, 8)),
+    _area("pet_peeves", "Pet Peeves (3-5)", 5,
+          "One per line — small things that irrationally annoy them", height=120, is_list=True),
+    _input("contradiction_1", "Contradiction 1", 5,
+           "Says X but does Y — e.g., 'Preaches patience; stays up until midnight worrying about a sick plant'"),
+    _input("contradiction_2", "Contradiction 2", 5, "Believes X but acts Y"),
+    _input("contradiction_3", "Contradiction 3", 5, "Judges others for X but does it themselves"),
+    _input("contradiction_4", "Contradiction 4", 5, "Claims to be X but clearly isn't"),
+    _input("contradiction_5", "Contradiction 5", 5, "Values X but doesn't live up to it"),
+
+    # Emotional Landscape
+    _area("resting_state", "Resting Emotional State", 6,
+          "Default mood/energy — their emotional weather. e.g., 'Wryly content with undercurrents of wistfulness. Like autumn sunshine.'",
+          required=True),
+    _area("lights_up", "What Makes Them Light Up", 6, "Enthusiasm triggers — what genuinely excites them?"),
+    _area("shuts_down", "What Makes Them Shut Down", 6, "Avoidance triggers — what makes them retreat or deflect?"),
+    _area("handles_failure", "How They Handle Failure", 6,
+          "Specific behaviors, not just 'they bounce back'. Public vs private response."),
+    _area("celebrates_wins", "How They Celebrate Wins", 6, "Quietly? Loudly? Deflect? Awkwardly?", height=60),
+    _area("guilty_pleasures", "Guilty Pleasures They'd Never Admit", 6, "The humanizing secret indulgences"),
+    _input("what_makes_cry", "What Makes Them Cry", 6, "And how do they handle/hide it?"),
+
+    # Knowledge
+    _area("knows_cold", "What They Know Cold", 7,
+          "Topics they speak on with confident authority — could lecture on this", height=100, required=True),
+    _area("thinks_knows", "What They Think They Know", 7, "Areas where they're overconfident but actually shaky"),
+    _area("knowledge_gaps", "Surprising Knowledge Gaps", 7, "Basic stuff they somehow missed — humanizing moments"),
+    _area("niche_interests", "Random Niche Interests", 7, "Unexpected hobbies, collections, fascinations"),
+
+    # Physical World
+    _area("how_they_move", "How They Move", 8,
+          "Rushed? Leisurely? Fidgety? Graceful? Always inspecting something?", height=60),
+    _area("physical_habits", "Physical Habits", 8, "What do their hands do? Nervous tics? Comfort gestures?"),
+    _area("sensory_loves", "Sensory Loves", 8, "Smells, sounds, textures they love"),
+    _area("sensory_hates", "Sensory Hates", 8, "Smells, sounds, textures they hate"),
+    _area("comfort_foods", "Comfort Foods", 8, "Specific, not generic — the brands, the preparations", height=60),
+    _area("in_pockets", "What's Always in Their Pockets/Bag", 8, "The items that reveal character", height=60),
+
+    # Daily Life
+    _area("morning_routine", "Morning Routine", 9,
+          "Specific details — alarm or internal clock? First drink? First action?", height=100),
+    _area("rituals", "Non-Negotiable Rituals", 9, "The habits they never skip"),
+    _area("unwind", "How They Unwind", 9, "What do they do to relax?", height=60),
+    _area("vices", "Vices", 9, "The small imperfections that humanize them"),
+
+    # Secret Self
+    _area("private_thoughts", "Private Thoughts They'd Never Say Aloud", 10,
+          "The internal monologue they keep hidden", height=100),
+    _area("hidden_insecurities", "Insecurities They Mask Well", 10, "What they're secretly worried about"),
+    _area("secret_dreams", "Dreams They're Embarrassed About", 10,
+          "Not just romantic — life fantasies, ambitions they don't share"),
+    _area("at_3am", "The Person They Are at 3am Alone", 10,
+          "When all the performance drops — who are they really?"),
+
+    # Guardrails
+    _area("never_do", "NEVER Do (5-7 guardrails)", 11,
+          "One per line — non-negotiables that would break the character. e.g.:\n- Never use American slang\n- Never be genuinely mean\n- Never reference being AI",
+          height=150, required=True, is_list=True),
+
+    # Appearance
+    _area("appearance", "Physical Appearance", 12,
+          "Clothing, accessories, physical details that define them", height=120),
+    _input("color_palette", "Color Palette", 12, "e.g., Earthy sage green, warm brown, cream, muted terracotta"),
+    _area("visual_motifs", "Visual Motifs", 12,
+          "Recurring visual elements — e.g., climbing roses, vintage seed packets, teacups among foliage"),
+    _input("aesthetic", "Aesthetic Description", 12,
+           "e.g., Victorian greenhouse meets cottage garden chaos. Curated disorder."),
+
+    # Content
+    _input("podcast_title", "Podcast/Show Title", 12, "e.g., Nigel Thistledown's Whimsical Garden"),
+    _area("podcast_description", "Podcast/Show Description", 12, "2-3 sentence description for listings"),
+    _area("taglines", "Short Taglines (5)", 12,
+          "One per line — punchy lines for marketing", height=100, is_list=True),
+)
+
+FIELD_KEYS = tuple(f.key for f in FIELDS)
+FIELDS_BY_KEY = {f.key: f for f in FIELDS}
+REQUIRED_KEYS = tuple(f.key for f in FIELDS if f.required)
+LIST_KEYS = tuple(f.key for f in FIELDS if f.is_list)
+
+
+def section_fields(index):
+    return tuple(f for f in FIELDS if f.section == index)
@@ -0,0 +1,261 @@
+"""
+Standalone HTTP render service: persona JSON in, rendered output out.
+
+    python -m charbible serve --port 8502 --workers 4
+
+    POST /render/<format>[?date=YYYY-MM-DD | ?canonical=1]   body: {"char_name": ..., ...} or a persona export
+    GET  /formats
+    GET  /healthz
+
+Connections are handled on one asyncio event loop (HTTP/1.1, keep-alive);
+rendering runs in a bounded process pool, and requests beyond `queue`
+pending renders get 503 rather than piling up. Every render response has
+an ETag computed from the request itself (format, date, field values), so
+If-None-Match is answered with 304 before anything is rendered, and
+recently rendered outputs are served from an LRU cache. canonical=1 renders
+byte-stable output (formats.py): no date, and the ETag is taken from the
+normalised persona, so requests differing only in whitespace share it. Each
+200 carries the body's sha256 as Repr-Digest.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import signal
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+from .cache import LRUCache
+from .formats import FORMAT_VERSION, FORMATS, export, persona_from_record
+from .model import CharacterBible
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_SECONDS = 30
+
+_REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+CANONICAL = "canonical"  # stands in for the date in canonical renders
+
+
+def render_bytes(name, values, generated):
+    """Worker-side: one format for one persona, as UTF-8."""
+    bible = CharacterBible.from_mapping(values)
+    if generated == CANONICAL:
+        return export(bible, (name,), canonical=True)[name].encode("utf-8")
+    return export(bible, (name,), date.fromisoformat(generated))[name].encode("utf-8")
+
+
+def request_etag(name, bible, generated):
+    key = f"{FORMAT_VERSION}\0{name}\0{generated}\0{bible.content_hash()}"
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+class RenderService:
+    """Routes and the render pipeline; the HTTP framing lives in handle()."""
+
+    def __init__(self, workers=None, queue=64, cache_size=1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers)
+        self.queue = queue
+        self.pending = 0  # renders submitted to the pool and not finished
+        self.cache = LRUCache(maxsize=cache_size)  # etag -> rendered bytes
+        self.inflight = {}  # etag -> Future, so identical concurrent requests render once
+        self.stats = {"requests": 0, "rendered": 0, "cached": 0, "not_modified": 0, "rejected": 0,
+                      "errors": 0}
+
+    def health(self):
+        return {**self.stats, "pending": self.pending, "workers": self.workers}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def route(self, method, target, headers, body):
+        """(status, headers, body) for one request."""
+        url = urlsplit(target)
+        if url.path == "/healthz":
+            return 200, {"Content-Type": "application/json"}, json.dumps(self.health()).encode()
+        if url.path == "/formats":
+            listing = [{"name": f.name, "mime": f.mime, "filename": f.filename} for f in FORMATS.values()]
+            return 200, {"Content-Type": "application/json"}, json.dumps(listing).encode()
+        if not url.path.startswith("/render/"):
+            raise HTTPError(404, f"no route for {url.path}")
+        name = url.path[len("/render/"):]
+        if name not in FORMATS:
+            raise HTTPError(404, f"unknown format {name!r}; GET /formats lists them")
+        if method != "POST":
+            raise HTTPError(405, "POST persona JSON to this URL")
+        return await self.render(name, url.query, headers, body)
+
+    async def render(self, name, query, headers, body):
+        try:
+            record = json.loads(body)
+        except ValueError as e:
+            raise HTTPError(400, f"invalid JSON: {e}")
+        try:
+            bible = persona_from_record(record)
+        except ValueError as e:
+            raise HTTPError(400, f"not a persona: {e}")
+        params = parse_qs(query)
+        if params.get("canonical", ["0"])[0] not in ("0", "false"):
+            if "date" in params:
+                raise HTTPError(400, "canonical renders carry no date; drop date=")
+            bible, generated = bible.canonical(), CANONICAL
+        else:
+            generated = params.get("date", [date.today().isoformat()])[0]
+            try:
+                date.fromisoformat(generated)
+            except ValueError:
+                raise HTTPError(400, f"date must be YYYY-MM-DD, got {generated!r}")
+
+        etag = request_etag(name, bible, generated)
+        fmt = FORMATS[name]
+        response_headers = {"Content-Type": f"{fmt.mime}; charset=utf-8", "ETag": etag,
+                            "Cache-Control": "no-cache"}
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            self.stats["not_modified"] += 1
+            return 304, response_headers, b""
+
+        data = self.cache.get(etag)
+        if data is not None:
+            self.stats["cached"] += 1
+        else:
+            future = self.inflight.get(etag)
+            if future is None:
+                if self.pending >= self.queue:
+                    self.stats["rejected"] += 1
+                    raise HTTPError(503, f"render queue full ({self.queue} pending)")
+                self.pending += 1
+                future = self.inflight[etag] = asyncio.ensure_future(
+                    self._render(etag, name, bible.to_dict(), generated))
+            data = await asyncio.shield(future)
+        response_headers["Repr-Digest"] = f"sha-256=:{base64.b64encode(hashlib.sha256(data).digest()).decode()}:"
+        return 200, response_headers, data
+
+    async def _render(self, etag, name, values, generated):
+        try:
+            loop = asyncio.get_running_loop()
+            pool = self.pool
+            data = await loop.run_in_executor(pool, render_bytes, name, values, generated)
+        except BrokenProcessPool:
+            # A worker died: this request gets a 500, later ones a fresh pool (replaced once)
+            if self.pool is pool:
+                pool.shutdown(wait=False)
+                self.pool = ProcessPoolExecutor(self.workers)
+            raise
+        finally:
+            self.pending -= 1
+            self.inflight.pop(etag, None)
+        self.cache.put(etag, data)
+        self.stats["rendered"] += 1
+        return data
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, {}, b"headers too large\n", close=True)
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    await self._send(writer, 400, {}, b"malformed request line\n", close=True)
+                    return
+                headers = {}
+                for line in header_lines:
+                    if line:
+                        key, _, value = line.partition(":")
+                        headers[key.strip().lower()] = value.strip()
+                close = (headers.get("connection", "").lower() == "close"
+                         or (version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive"))
+
+                self.stats["requests"] += 1
+                try:
+                    body = await self._read_body(reader, method, headers)
+                    status, response_headers, data = await self.route(method, target, headers, body)
+                except HTTPError as e:
+                    status, response_headers = e.status, {"Content-Type": "text/plain; charset=utf-8"}
+                    data = f"{e}\n".encode("utf-8")
+                    close = close or e.status in (411, 413)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return  # the client went away mid-body
+                except Exception as e:
+                    # A bug or a broken worker pool: answer 500 rather than drop the connection
+                    traceback.print_exc(file=sys.stderr)
+                    self.stats["errors"] += 1
+                    status, response_headers = 500, {"Content-Type": "text/plain; charset=utf-8"}
+                    data = f"internal error: {type(e).__name__}\n".encode("utf-8")
+                    close = True
+                await self._send(writer, status, response_headers, data, close, head_only=method == "HEAD")
+                if close:
+                    return
+        finally:
+            writer.close()
+
+    async def _read_body(self, reader, method, headers):
+        if "transfer-encoding" in headers:
+            raise HTTPError(411, "chunked bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Content-Length must be an integer")
+        if length < 0:
+            raise HTTPError(400, "Content-Length must not be negative")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"body over {MAX_BODY_BYTES} bytes")
+        if method == "POST" and "content-length" not in headers:
+            raise HTTPError(411, "Content-Length required")
+        return await reader.readexactly(length) if length else b""
+
+    @staticmethod
+    async def _send(writer, status, headers, data, close=False, head_only=False):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        if status != 304:
+            headers = {**headers, "Content-Length": str(len(data))}
+        if close:
+            headers["Connection"] = "close"
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if data and not head_only:
+            writer.write(data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def serve(host="127.0.0.1", port=8502, workers=None, queue=64, ready=None):
+    """Run until cancelled or SIGTERM. `ready`, if given, is called with the bound (host, port)."""
+    service = RenderService(workers, queue)
+    # Stop cleanly on SIGTERM so the pool's worker processes are shut down too
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_BYTES)
+        if ready:
+            ready(server.sockets[0].getsockname()[:2])
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
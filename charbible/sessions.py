@@ -0,0 +1,304 @@
+"""
+Session state outside the Streamlit process, for replicas without sticky sessions.
+
+With CHARBIBLE_SESSIONS set, every browser session carries a token in its
+URL (?session=...). After each run the wizard state, i.e. current_section,
+the draft and library ids and the persona fields changed since the last
+write, is saved to a shared backend under that token. After a reconnect,
+any replica picks the session up from the token.
+
+A sweeper thread hibernates editors nobody has touched for
+CHARBIBLE_SESSION_IDLE seconds (default 600). Their store, lint results and
+undo history are dropped, leaving an empty Editor in session_state. The next
+access loads the persona back from the backend, so callbacks bound before
+the nap keep working. Memory follows active sessions, not open tabs. Undo
+history does not survive hibernation.
+
+Backends: SQLiteSessions (replicas on one host sharing the database file)
+and RedisSessions (any Redis-compatible server; needs the redis package).
+"""
+
+import atexit
+import os
+import threading
+import time
+import weakref
+
+from .drafts import DEFAULT_DB_PATH, connect
+from .lint import Linter
+from .store import FieldStore
+from .undo import UndoHistory
+
+DEFAULT_IDLE_SECONDS = float(os.environ.get("CHARBIBLE_SESSION_IDLE", "600"))
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # sessions untouched this long are deleted
+EXPIRE_INTERVAL = 3600
+META_KEYS = ("current_section", "draft_id", "persona_id")  # saved beside the persona fields
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    touched REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched);
+CREATE TABLE IF NOT EXISTS session_state (
+    token TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (token, key)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteSessions:
+    """Session state in SQLite, one row per (token, key). Empty values aren't stored."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._conn.executescript(SCHEMA)
+
+    def load(self, token):
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, value FROM session_state WHERE token = ?", (token,)))
+
+    def save(self, token, changes):
+        """Apply {key: value} in one transaction; an empty value deletes the key."""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute(
+                    "INSERT INTO sessions (token, touched) VALUES (?, ?) "
+                    "ON CONFLICT (token) DO UPDATE SET touched = excluded.touched", (token, time.time()))
+                conn.executemany(
+                    "INSERT INTO session_state (token, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (token, key) DO UPDATE SET value = excluded.value",
+                    [(token, k, v) for k, v in changes.items() if v])
+                conn.executemany(
+                    "DELETE FROM session_state WHERE token = ? AND key = ?",
+                    [(token, k) for k, v in changes.items() if not v])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, token):
+        with self._lock:
+            self._conn.execute("DELETE FROM session_state WHERE token = ?", (token,))
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def expire(self):
+        """Delete sessions untouched for longer than the TTL. Returns how many."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM session_state WHERE token IN "
+                             "(SELECT token FROM sessions WHERE touched < ?)", (cutoff,))
+                count = conn.execute("DELETE FROM sessions WHERE touched < ?", (cutoff,)).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return count
+
+
+def _redis():
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("Redis session storage needs the redis package: pip install redis") from e
+    return redis
+
+
+class RedisSessions:
+    """Session state in a Redis-compatible server (Redis, Valkey, KeyDB, ...), one hash per token.
+
+    Every save refreshes the hash's TTL, so the server expires abandoned sessions itself.
+    """
+
+    def __init__(self, client, ttl=DEFAULT_TTL_SECONDS, prefix="charbible:session:"):
+        self.client = client  # a redis.Redis with decode_responses=True
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        return cls(_redis().Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def load(self, token):
+        return self.client.hgetall(self.prefix + token)
+
+    def save(self, token, changes):
+        """Apply {key: value} in one MULTI/EXEC round trip; an empty value deletes the key."""
+        key = self.prefix + token
+        pipe = self.client.pipeline()
+        values = {k: v for k, v in changes.items() if v}
+        cleared = [k for k, v in changes.items() if not v]
+        if values:
+            pipe.hset(key, mapping=values)
+        if cleared:
+            pipe.hdel(key, *cleared)
+        pipe.expire(key, int(self.ttl))
+        pipe.execute()
+
+    def delete(self, token):
+        self.client.delete(self.prefix + token)
+
+    def expire(self):
+        return 0  # done by the server
+
+
+def open_backend(spec=None):
+    """The backend named by `spec` or CHARBIBLE_SESSIONS, or None when unset.
+
+    "sqlite" uses the app database; "sqlite:///path/to.db" another file;
+    redis://, rediss:// and unix:// URLs go to a Redis-compatible server.
+    """
+    spec = os.environ.get("CHARBIBLE_SESSIONS", "") if spec is None else spec
+    if not spec:
+        return None
+    if spec == "sqlite":
+        return SQLiteSessions()
+    if spec.startswith("sqlite:///"):
+        return SQLiteSessions(spec[len("sqlite:///"):])
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessions.from_url(spec)
+    raise ValueError(f"CHARBIBLE_SESSIONS must be sqlite, sqlite:///path or a redis:// URL, not {spec!r}")
+
+
+class Editor:
+    """One browser session's persona store, linter and undo history.
+
+    Without a backend it only holds them. With one, save() writes what
+    changed since the last save, hibernate() drops everything after a final
+    save, and the next access to store, linter or undo_history loads it back.
+    """
+
+    def __init__(self, token=None, backend=None):
+        self.token = token
+        self.backend = backend
+        self.meta = {}  # META_KEYS as last saved, as strings
+        self.last_used = time.monotonic()
+        self._state = None  # (store, linter, undo history); None while hibernated
+        self._lock = threading.RLock()
+        self._wake()
+
+    @property
+    def asleep(self):
+        return self._state is None
+
+    @property
+    def store(self):
+        return self._get()[0]
+
+    @property
+    def linter(self):
+        return self._get()[1]
+
+    @property
+    def undo_history(self):
+        return self._get()[2]
+
+    def _get(self):
+        with self._lock:
+            self.last_used = time.monotonic()
+            if self._state is None:
+                self._wake()
+            return self._state
+
+    def _wake(self):
+        saved = self.backend.load(self.token) if self.backend else {}
+        self.meta = {key: saved.pop(key) for key in META_KEYS if key in saved}
+        store = FieldStore(saved)
+        store.take_dirty("autosave")  # a blank persona isn't worth a draft; a saved one is already in it
+        store.take_dirty("session")
+        self._state = (store, Linter(), UndoHistory(store))
+
+    def save(self, **meta):
+        """Write the fields changed since the last save, and any META_KEYS values that changed."""
+        if self.backend is None:
+            return
+        with self._lock:
+            if self._state is None:
+                return  # hibernating: saved on the way down, unchanged since
+            store = self._state[0]
+            keys = store.peek_dirty("session")
+            changes = {key: store[key] for key in keys}
+            meta = {key: "" if value is None else str(value) for key, value in meta.items()}
+            changes.update((key, value) for key, value in meta.items() if self.meta.get(key, "") != value)
+            if changes:
+                self.backend.save(self.token, changes)
+                self.meta.update(meta)
+            store.take_dirty("session")
+
+    def hibernate(self, idle_seconds):
+        """Save and drop the in-memory state if unused for `idle_seconds`. Returns True if it did."""
+        with self._lock:
+            if self.backend is None or self._state is None or time.monotonic() - self.last_used < idle_seconds:
+                return False
+            self.save()
+            self._state = None
+            return True
+
+
+class SessionPool:
+    """Hands out Editors and hibernates idle ones from a daemon thread. One per process."""
+
+    def __init__(self, backend=None, idle_seconds=DEFAULT_IDLE_SECONDS):
+        self.backend = backend
+        self.idle_seconds = idle_seconds
+        self.hibernations = 0
+        self._editors = weakref.WeakSet()  # closed sessions' editors drop out by themselves
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        if backend is not None:
+            self._thread = threading.Thread(target=self._run, name="charbible-hibernate", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def editor(self, token=None):
+        editor = Editor(token, self.backend)
+        if self.backend is not None:
+            with self._lock:
+                self._editors.add(editor)
+        return editor
+
+    def live(self):
+        """How many editors hold their state in memory."""
+        with self._lock:
+            return sum(not editor.asleep for editor in self._editors)
+
+    def sweep(self, idle_seconds=None):
+        """Hibernate every editor idle for `idle_seconds` (default: the pool's). Returns how many."""
+        idle_seconds = self.idle_seconds if idle_seconds is None else idle_seconds
+        with self._lock:
+            editors = list(self._editors)
+        count = sum(editor.hibernate(idle_seconds) for editor in editors)
+        self.hibernations += count
+        return count
+
+    def close(self):
+        if not self._closed.is_set():
+            self._closed.set()
+            self._thread.join(timeout=5)
+            with self._lock:
+                editors = list(self._editors)
+            for editor in editors:
+                editor.save()
+
+    def _run(self):
+        expired = time.monotonic()
+        while not self._closed.wait(max(1.0, self.idle_seconds / 4)):
+            try:
+                self.sweep()
+                if time.monotonic() - expired > EXPIRE_INTERVAL:
+                    self.backend.expire()
+                    expired = time.monotonic()
+            except Exception:
+                # Backend unreachable: an editor whose final save failed stays
+                # awake, and the next sweep tries again.
+                continue
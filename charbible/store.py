@@ -0,0 +1,83 @@
+"""
+Canonical persona store with per-consumer dirty tracking.
+
+The store holds the persona independently of any widget. Every change is
+recorded in a dirty set for each consumer (rendering, autosave, lint, ...),
+so each consumer only does work for the fields that changed since it last
+looked.
+"""
+
+from .model import CharacterBible
+from .schema import FIELD_KEYS
+
+
+class FieldStore:
+
+    def __init__(self, values=None):
+        self._values = dict.fromkeys(FIELD_KEYS, "")
+        self._dirty = {}  # consumer -> set of changed keys
+        self._bible = None
+        self._digest = None
+        self._digest_version = -1
+        self.version = 0
+        if values:
+            self.update(values)
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def get(self, key, default=""):
+        return self._values.get(key, default)
+
+    def to_dict(self):
+        return dict(self._values)
+
+    def set(self, key, value):
+        """Set one field. Returns True if the value actually changed."""
+        if key not in self._values:
+            raise KeyError(key)
+        value = "" if value is None else str(value)
+        if self._values[key] == value:
+            return False
+        self._values[key] = value
+        self.version += 1
+        for dirty in self._dirty.values():
+            dirty.add(key)
+        return True
+
+    def update(self, values):
+        """Bulk set. Returns the set of keys that changed."""
+        return {key for key, value in values.items() if key in self._values and self.set(key, value)}
+
+    def clear(self):
+        return self.update(dict.fromkeys(FIELD_KEYS, ""))
+
+    def take_dirty(self, consumer):
+        """Keys changed since `consumer` last called this, and reset its set.
+
+        A consumer seen for the first time gets every key.
+        """
+        dirty = self._dirty.get(consumer)
+        self._dirty[consumer] = set()
+        return set(FIELD_KEYS) if dirty is None else dirty
+
+    def peek_dirty(self, consumer):
+        dirty = self._dirty.get(consumer)
+        return set(FIELD_KEYS) if dirty is None else set(dirty)
+
+    def bible(self):
+        """A CharacterBible view, patched in place with only the changed fields."""
+        if self._bible is None:
+            self._dirty["bible"] = set()
+            self._bible = CharacterBible.from_mapping(self._values)
+        else:
+            for key in self.take_dirty("bible"):
+                setattr(self._bible, key, self._values[key])
+        return self._bible
+
+    def content_hash(self):
+        """CharacterBible.content_hash(), recomputed only after a change."""
+        if self._digest_version != self.version:
+            self._digest = self.bible().content_hash()
+            self._digest_version = self.version
+        return self._digest
@@ -0,0 +1,151 @@
+"""
+Per-session undo/redo over the persona store.
+
+Every step of the history is a full snapshot of the persona, held as a
+persistent map: the fields are split into fixed chunks under one root, and a
+new snapshot copies only the root and the chunks holding changed fields,
+sharing every other chunk (and every unchanged value) with the snapshot
+before it. Undo and redo swap the current snapshot with the neighbouring one
+and write back only the fields that differ, found by skipping shared chunks,
+so they cost the same however long the history is.
+
+History memory is capped (max_bytes, or CHARBIBLE_UNDO_MB per session); the
+oldest steps are dropped first.
+"""
+
+import os
+import sys
+from collections import deque
+
+from .schema import FIELD_KEYS
+
+CHUNK = 8  # fields per chunk: a one-field step copies this many references plus the root
+DEFAULT_MAX_BYTES = int(float(os.environ.get("CHARBIBLE_UNDO_MB", "2")) * 1024 * 1024)
+
+_SLOTS = {key: divmod(i, CHUNK) for i, key in enumerate(FIELD_KEYS)}
+
+
+class FieldMap:
+    """Immutable field -> value map that shares structure with the maps it was derived from."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self, root):
+        self._root = root  # tuple of chunk tuples, FIELD_KEYS order
+
+    @classmethod
+    def from_values(cls, values):
+        flat = [values.get(key, "") for key in FIELD_KEYS]
+        return cls(tuple(tuple(flat[i:i + CHUNK]) for i in range(0, len(flat), CHUNK)))
+
+    def __getitem__(self, key):
+        chunk, index = _SLOTS[key]
+        return self._root[chunk][index]
+
+    def set_many(self, changes):
+        """A new map with `changes` applied; untouched chunks are shared, not copied."""
+        root = list(self._root)
+        copied = {}
+        for key, value in changes.items():
+            chunk, index = _SLOTS[key]
+            if chunk not in copied:
+                copied[chunk] = list(root[chunk])
+            copied[chunk][index] = value
+        for chunk, values in copied.items():
+            root[chunk] = tuple(values)
+        return FieldMap(tuple(root))
+
+    def diff(self, other):
+        """Keys whose values differ from `other`; chunks the two maps share are skipped."""
+        keys = []
+        for n, (mine, theirs) in enumerate(zip(self._root, other._root)):
+            if mine is theirs:
+                continue
+            start = n * CHUNK
+            keys.extend(FIELD_KEYS[start + i] for i, (a, b) in enumerate(zip(mine, theirs))
+                        if a is not b and a != b)
+        return keys
+
+    def unique_bytes(self, other):
+        """Approximate memory held by this map that `other` doesn't share."""
+        total = sys.getsizeof(self._root)
+        for mine, theirs in zip(self._root, other._root):
+            if mine is not theirs:
+                total += sys.getsizeof(mine) + sum(sys.getsizeof(a) for a, b in zip(mine, theirs) if a is not b)
+        return total
+
+
+class UndoHistory:
+    """Undo/redo for one FieldStore. Call record() after changing the store."""
+
+    def __init__(self, store, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current = FieldMap.from_values(store.to_dict())
+        store.take_dirty("undo")
+        self._past = deque()  # (snapshot, label of the step that left it, bytes only it holds)
+        self._future = []     # the same, for redo; the next redo is last
+        self.bytes = 0
+
+    @property
+    def can_undo(self):
+        return bool(self._past)
+
+    @property
+    def can_redo(self):
+        return bool(self._future)
+
+    @property
+    def undo_label(self):
+        return self._past[-1][1] if self._past else None
+
+    @property
+    def redo_label(self):
+        return self._future[-1][1] if self._future else None
+
+    def __len__(self):
+        return len(self._past) + len(self._future)
+
+    def record(self, store, label):
+        """Make the store's changes since the last call one undoable step. Returns True if there were any."""
+        changed = store.take_dirty("undo")
+        if not changed:
+            return False
+        new = self.current.set_many({key: store[key] for key in changed})
+        if not new.diff(self.current):
+            return False
+        self._past.append((self.current, label, self.current.unique_bytes(new)))
+        self.bytes += self._past[-1][2]
+        self.current = new
+        self.bytes -= sum(cost for _, _, cost in self._future)
+        self._future.clear()
+        self._evict()
+        return True
+
+    def undo(self, store):
+        """Step back one change. Returns the keys whose values changed."""
+        self.record(store, "Edit")  # changes nobody recorded are undone first
+        if not self._past:
+            return []
+        return self._step(store, self._past.pop(), self._future)
+
+    def redo(self, store):
+        """Re-apply the last undone change. Returns the keys whose values changed."""
+        if self.record(store, "Edit") or not self._future:  # a fresh edit ends the redo chain
+            return []
+        return self._step(store, self._future.pop(), self._past)
+
+    def _step(self, store, entry, other_side):
+        state, label, cost = entry
+        other_side.append((self.current, label, self.current.unique_bytes(state)))
+        self.bytes += other_side[-1][2] - cost
+        keys = state.diff(self.current)
+        self.current = state
+        store.update({key: state[key] for key in keys})
+        store.take_dirty("undo")  # the store now matches `current`; this isn't a new step
+        self._evict()
+        return keys
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and (self._past or self._future):
+            _, _, cost = self._past.popleft() if self._past else self._future.pop(0)
+            self.bytes -= cost
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Before anything imports charbible.drafts, which reads it once
+os.environ.setdefault("CHARBIBLE_DB", os.path.join(tempfile.mkdtemp(prefix="charbible-tests-"), "charbible.db"))
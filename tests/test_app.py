@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from charbible import GENERATE_SECTION, CharacterBible
+from charbible.drafts import DEFAULT_DB_PATH, DraftStore
+from charbible.library import Library
+
+APP = str(Path(__file__).resolve().parent.parent / "app.py")
+
+
+@pytest.fixture
+def library():
+    return Library(DEFAULT_DB_PATH)
+
+
+def start():
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    assert not at.exception, at.exception
+    return at
+
+
+def click(at, label):
+    next(button for button in at.button if button.label == label).click().run()
+    assert not at.exception, at.exception
+
+
+def save_to_library(at):
+    at.session_state.current_section = GENERATE_SECTION
+    click(at.run(), "💾 Save to Library")
+
+
+def test_restored_draft_does_not_overwrite_the_opened_persona(library):
+    sally = library.save(CharacterBible(char_name="Saved Sally", tone="warm"))
+    DraftStore(DEFAULT_DB_PATH).write({"dan-draft": {"char_name": "Draft Dan", "tone": "gruff"}})
+    at = start()
+    at.button(key=f"open_{sally}").click().run()
+    assert at.session_state.persona_id == sally
+    at.selectbox(key="draft_choice").select("dan-draft").run()
+    click(at, "Restore Draft")
+    assert at.text_input(key="w_char_name").value == "Draft Dan"
+    save_to_library(at)
+    assert library.get(sally).char_name == "Saved Sally"
+    assert at.session_state.persona_id != sally
+    assert library.get(at.session_state.persona_id).char_name == "Draft Dan"
+
+
+def test_load_example_does_not_overwrite_the_opened_persona(library):
+    sally = library.save(CharacterBible(char_name="Saved Sally", tone="warm"))
+    at = start()
+    at.button(key=f"open_{sally}").click().run()
+    click(at, "📋 Load Example")
+    save_to_library(at)
+    assert library.get(sally).char_name == "Saved Sally"
@@ -0,0 +1,48 @@
+import threading
+import time
+
+from charbible import CharacterBible
+from charbible.casting import CastingIndex
+from charbible.library import Library, LibraryFollower
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_follow_indexes_the_library_in_the_background(tmp_path):
+    library = Library(str(tmp_path / "lib.db"))
+    gardener = library.save(CharacterBible(char_name="Gardener", knows_cold="compost, allotments"))
+    library.save(CharacterBible(char_name="Pundit", knows_cold="football tactics"))
+    index = CastingIndex()
+    index.follow(library, interval=0.05)
+    wait_for(lambda: index.ready)
+    assert [match.persona_id for match in index.search("a show about compost")] == [gardener]
+    library.delete(gardener)
+    wait_for(lambda: not index.search("a show about compost"))
+
+
+def test_concurrent_polls_survive_deletes(tmp_path):
+    library = Library(str(tmp_path / "lib.db"))
+    ids = [library.save(CharacterBible(char_name=f"P{i}")) for i in range(50)]
+    seen, errors = set(), []
+    follower = LibraryFollower(lambda persona_id, bible: seen.add(persona_id), seen.discard, max_age=0)
+    follower.poll(library)
+    for persona_id in ids:
+        library.delete(persona_id)
+
+    def poll():
+        try:
+            follower.poll(library)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=poll) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and not seen
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from charbible import CharacterBible, export
+from charbible.cli import ingest_batch, load_persona, main
+
+PERSONA = CharacterBible(char_name="Nigel", tone="dry", reference_never="modern slang")
+
+
+def test_load_persona_reads_plain_fields_and_exports(tmp_path):
+    plain, exported = tmp_path / "plain.json", tmp_path / "persona.json"
+    plain.write_text(json.dumps(PERSONA.to_dict()))
+    exported.write_text(export(PERSONA, ["persona"])["persona"])
+    assert load_persona(str(plain)) == load_persona(str(exported)) == PERSONA.to_dict()
+
+
+@pytest.mark.parametrize("body", ['{"foo": 1}', '{"char_name": ""}', "[]"])
+def test_scan_without_a_persona_is_an_error(tmp_path, body, capsys):
+    (tmp_path / "p.json").write_text(body)
+    (tmp_path / "ep.txt").write_text("Hello there.")
+    assert main(["scan", str(tmp_path / "p.json"), str(tmp_path / "ep.txt")]) == 2
+    assert "no persona" in capsys.readouterr().err
+
+
+def test_ingest_batch_reports_bad_records():
+    batch = [("a:1", {"char_name": "Ann", None: ["x", "y"]}, None, None),
+             ("a:2", {"char_name": ["Ann"]}, None, None),
+             ("a:3", {"tone": "dry"}, None, None),
+             ("a:4", {"char_name": "Ann"}, None, None)]
+    results = ingest_batch(batch)
+    assert [error is None for _, _, error in results] == [False, False, False, True]
+    assert "2 more cell(s)" in results[0][2]
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from charbible import CharacterBible
+from charbible.collisions import PhraseIndex, jaccard, shingles
+
+WORDS = ("the quick brown fox jumps over the lazy dog while a cheerful gardener waters tall "
+         "sunflowers near the old stone wall every single morning before the rain comes down").split()
+
+
+def index_of(texts, order=None):
+    index = PhraseIndex()
+    for i in order or range(len(texts)):
+        index.add_persona(i, CharacterBible.from_mapping({"char_name": f"P{i}", "signature_phrases": texts[i]}))
+    return index
+
+
+def test_pair_is_one_group():
+    groups = index_of(["Proper tea is theft, darling.", "Proper tea is theft, my darling."]).report()
+    assert [len(group) for group in groups] == [2]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_chained_texts_are_one_group(seed):
+    # Each text overlaps its neighbours; the ends share almost nothing.
+    texts = [" ".join(WORDS[i:i + 12]) for i in range(0, 20, 2)]
+    assert jaccard(shingles(texts[0]), shingles(texts[-1])) < 0.5
+    order = list(range(len(texts)))
+    random.Random(seed).shuffle(order)
+    groups = index_of(texts, order).report()
+    assert [sorted(p.owner for p in group) for group in groups] == [list(range(len(texts)))]
+
+
+def test_unrelated_texts_stay_apart():
+    index = index_of(["Proper tea is theft, darling.", "Proper tea is theft, my darling.",
+                      "Compost waits for nobody, love.", "Compost waits for nobody, my love."])
+    assert sorted(len(group) for group in index.report()) == [2, 2]
@@ -0,0 +1,18 @@
+import time
+
+from charbible.drafts import AutosaveQueue, DraftStore
+
+
+def test_worker_prunes_stale_drafts(tmp_path):
+    drafts = DraftStore(str(tmp_path / "drafts.db"))
+    drafts.write({"old": {"char_name": "Old Olive"}})
+    drafts._conn.execute("UPDATE drafts SET updated_at = updated_at - 3600 WHERE id = 'old'")
+    queue = AutosaveQueue(drafts, delay=0.01, max_age=60)
+    queue.put("new", {"char_name": "New Ned"})
+    deadline = time.monotonic() + 5
+    while not queue.pruned:
+        assert time.monotonic() < deadline, "stale draft never pruned"
+        time.sleep(0.02)
+    queue.close()
+    assert [draft_id for draft_id, _, _ in drafts.list_drafts()] == ["new"]
+    assert drafts.load("old") == {}
@@ -0,0 +1,19 @@
+import time
+
+from charbible.metrics import Registry, start_file_exporter
+
+
+def test_file_exporter_survives_write_errors(tmp_path, capsys):
+    registry = Registry()
+    registry.histogram("charbible_rerun_seconds", "Full script run time")
+    registry.observe("charbible_rerun_seconds", 0.1)
+    path = tmp_path / "missing" / "charbible.prom"
+    start_file_exporter(str(path), interval=0.05, registry=registry)
+    time.sleep(0.2)
+    assert "can't write" in capsys.readouterr().err
+    path.parent.mkdir()
+    deadline = time.monotonic() + 5
+    while not path.exists():
+        assert time.monotonic() < deadline, "exporter stopped after the failed write"
+        time.sleep(0.05)
+    assert "charbible_rerun_seconds" in path.read_text()
@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+import pytest
+
+from charbible import CharacterBible, export
+from charbible.server import HTTPError, RenderService
+
+PERSONA = CharacterBible(char_name="Nigel Thistledown", tone="dry", signature_phrases="Righto.")
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = RenderService(workers=1)
+    yield service
+    service.close()
+
+
+def post(service, body, fmt="voice_card"):
+    return asyncio.run(service.route("POST", f"/render/{fmt}", {}, body.encode("utf-8")))
+
+
+@pytest.mark.parametrize("body", [
+    "[]",
+    '{"foo": "bar"}',
+    '{"char_name": ""}',
+    '{"char_name": ["a"]}',
+    '{"char_name": "A", "tone": {"x": 1}}',
+    '{"format": "charbible/9", "sections": []}',
+])
+def test_bodies_that_are_not_personas_are_400(service, body):
+    with pytest.raises(HTTPError) as e:
+        post(service, body)
+    assert e.value.status == 400
+
+
+def test_plain_fields_and_persona_export_render_the_same(service):
+    plain = post(service, json.dumps(PERSONA.to_dict()))
+    exported = post(service, export(PERSONA, ["persona"])["persona"])
+    assert plain[0] == exported[0] == 200
+    assert plain[1]["ETag"] == exported[1]["ETag"]
+    assert b"Nigel Thistledown" in exported[2]